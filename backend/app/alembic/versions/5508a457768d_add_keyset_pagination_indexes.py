@@ -0,0 +1,33 @@
+"""add keyset pagination indexes
+
+Revision ID: 5508a457768d
+Revises: 549a4f5fcaa1
+Create Date: 2026-10-17 09:12:41.302114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5508a457768d'
+down_revision: Union[str, Sequence[str], None] = '549a4f5fcaa1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so large tables stay writable while the index is created.
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_device_created_at_id'), 'device', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_user_created_at_id'), 'user', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_user_created_at_id'), table_name='user', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_device_created_at_id'), table_name='device', postgresql_concurrently=True)
@@ -0,0 +1,39 @@
+"""drop write-amplifying user indexes
+
+Revision ID: 7d2e9b41c0a8
+Revises: a3c1f2d4b5e6
+Create Date: 2026-10-17 11:20:37.512904
+
+No query looks users up by password hash or full name, and boolean flags are too
+unselective for an index to beat a scan; each of these only slowed down writes.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e9b41c0a8'
+down_revision: Union[str, Sequence[str], None] = 'a3c1f2d4b5e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_user_hashed_password'), table_name='user', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_user_full_name'), table_name='user', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_user_is_active'), table_name='user', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_user_is_superuser'), table_name='user', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_user_is_superuser'), 'user', ['is_superuser'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_user_is_active'), 'user', ['is_active'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_user_full_name'), 'user', ['full_name'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_user_hashed_password'), 'user', ['hashed_password'], unique=False, postgresql_concurrently=True)
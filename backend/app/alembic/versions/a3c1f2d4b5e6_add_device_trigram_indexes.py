@@ -0,0 +1,48 @@
+"""add device trigram indexes
+
+Revision ID: a3c1f2d4b5e6
+Revises: 5508a457768d
+Create Date: 2026-10-17 10:05:13.884201
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c1f2d4b5e6'
+down_revision: Union[str, Sequence[str], None] = '5508a457768d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    available = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if not available:
+        # Servers without the contrib modules still migrate; only device search needs it.
+        logger.warning("pg_trgm is not available on this server: skipping the device trigram indexes, /devices/search will fail")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Built concurrently so large tables stay writable while the index is created.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_device_name_trgm', 'device', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_device_model_trgm', 'device', ['model'], unique=False, postgresql_using='gin', postgresql_ops={'model': 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_device_serial_number_trgm', 'device', ['serial_number'], unique=False, postgresql_using='gin', postgresql_ops={'serial_number': 'gin_trgm_ops'}, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The pg_trgm extension is left installed; other objects may depend on it.
+    # The indexes are missing when upgrade() found no pg_trgm.
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_device_serial_number_trgm', table_name='device', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_device_model_trgm', table_name='device', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_device_name_trgm', table_name='device', postgresql_concurrently=True, if_exists=True)
@@ -1,13 +1,24 @@
 from fastapi import APIRouter
 
-from app.api.routers.v1 import(
-    users,
-    login,
-    devices,
-)
+from app.core.config import settings
+from app.api.routers.v1 import internal
+
+if settings.SQLALCHEMY_ASYNC:
+    from app.api.routers.v1_async import(
+        users,
+        login,
+        devices,
+    )
+else:
+    from app.api.routers.v1 import(
+        users,
+        login,
+        devices,
+    )
 
 api_router = APIRouter()
 
 api_router.include_router(login.router, prefix="/login", tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(devices.router, prefix="/devices", tags=["devices"])
+api_router.include_router(internal.router, prefix="/internal", tags=["internal"])
@@ -1,15 +1,18 @@
+import csv
+import io
 from math import e
 from multiprocessing import Value
 from shutil import ExecError
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from pydantic import TypeAdapter
+from typing import Any, Iterator, List, Literal, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from uuid import UUID
 
 from app import crud, schemas, models
 from app import dependencies
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -18,46 +21,185 @@ router = APIRouter()
 def create_device(
     *,
     db: Session = Depends(dependencies.get_db),
-    current_user = Depends(dependencies.get_current_user),
+    current_user = Depends(dependencies.get_current_user_rw),
     device_in: schemas.sql.DeviceCreate,
 ):
-    existing_device = crud.sql.device.read_by_column(db=db, column=models.sql.Device.serial_number, value=device_in.serial_number) # TODO: Fix This 
-
-    if existing_device:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Device with serial number '{device_in.serial_number}' already exists"
-        )
     try:
-    # Create device and associate with current user
+        # A duplicate serial number inserts nothing instead of failing, so there is no
+        # separate existence check to race against
         new_device = crud.sql.device.create(
             db=db, 
             obj_in=device_in, 
+            on_conflict_do_nothing=[models.sql.Device.serial_number],
         )
-        return schemas.sql.Device.model_validate(new_device)
+    except crud.sql.UniqueViolationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e: 
         raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
 
+    if new_device is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Device with serial number '{device_in.serial_number}' already exists"
+        )
+    return schemas.sql.Device.model_validate(new_device)
+
+
+
+@router.post("/bulk", response_model=schemas.sql.DeviceBulkResult)
+def bulk_upsert_devices(
+    *,
+    db: Session = Depends(dependencies.get_db),
+    current_user = Depends(dependencies.get_current_user_rw),
+    devices_in: List[schemas.sql.DeviceCreate] = Body(..., min_length=1, max_length=settings.BULK_MAX_ITEMS),
+    on_conflict: Literal["update", "skip"] = "update",
+) -> Any:
+    """
+    Create or update many devices keyed by serial number.
+
+    With `on_conflict=update` existing serial numbers are updated in place; with `skip` they are
+    left untouched and reported as conflicts. Repeated serial numbers within one request are
+    written once and the repeats reported as conflicts.
+    """
+    results = crud.sql.device.upsert_many(
+        db=db,
+        objs_in=devices_in,
+        index_elements=[models.sql.Device.serial_number],
+        update_existing=on_conflict == "update",
+        chunk_size=settings.BULK_CHUNK_SIZE,
+    )
+
+    items = [
+        schemas.sql.DeviceBulkItem(
+            index=index,
+            serial_number=device_in.serial_number,
+            status=status_,
+            id=row.id if row is not None else None,
+        )
+        for index, (device_in, (status_, row)) in enumerate(zip(devices_in, results))
+    ]
+    return schemas.sql.DeviceBulkResult(
+        inserted=sum(item.status == "inserted" for item in items),
+        updated=sum(item.status == "updated" for item in items),
+        conflicts=sum(item.status == "conflict" for item in items),
+        items=items,
+    )
 
 
 @router.get("/", response_model=List[schemas.sql.Device])
 def read_devices(
     *,
-    db: Session = Depends(dependencies.get_db),
+    db: Session = Depends(dependencies.get_read_db),
     current_user = Depends(dependencies.get_current_user),
-    offset = 0,
-    limit = 100
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[crud.sql.CountMode] = None,
 ) -> Any:
-    # Get devices for the current user 
+    """
+    List devices in a stable order. Pass the `X-Next-Cursor` response header back as
+    `cursor` to fetch the next page; it is absent on the last page.
+
+    Filter with `filter=field:operator:value` (repeatable, e.g. `filter=model:eq:X`,
+    `filter=name:prefix:abc`) and order with `sort=field` or `sort=-field`, on indexed
+    fields only. Keep the same filters and sort while following the cursor.
+
+    With `count`, the number of matching devices is returned in `X-Total-Count`:
+    `exact` counts them, `estimated` takes the planner's estimate and `cached` reuses a
+    recent exact count. The latter two also set `X-Total-Count-Estimated: true`.
+    """
+    try:
+        query = crud.sql.device.parse_query(filters, sort)
+        devices, next_cursor = crud.sql.device.read_page(
+            db=db, cursor=cursor, offset=offset, limit=limit, as_dicts=True, query=query
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if count is not None:
+        headers["X-Total-Count"] = str(crud.sql.device.count(db=db, mode=count, query=query))
+        if count != "exact":
+            headers["X-Total-Count-Estimated"] = "true"
+    return Response(
+        schemas.sql.dump_json_list(schemas.sql.Device, devices), media_type="application/json", headers=headers
+    )
+
+
+@router.get("/search", response_model=List[schemas.sql.Device])
+def search_devices(
+    *,
+    db: Session = Depends(dependencies.get_read_db),
+    current_user = Depends(dependencies.get_current_user),
+    q: str = Query(..., min_length=3, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    Find devices whose name, model or serial number contains `q`, most similar first.
+    """
+    devices = crud.sql.device.search(db=db, q=q, limit=limit, as_dicts=True)
+    return Response(schemas.sql.dump_json_list(schemas.sql.Device, devices), media_type="application/json")
+
 
-    devices = crud.sql.device.read_multi(db=db,offset=offset, limit=limit)
-    return TypeAdapter(List[schemas.sql.Device]).validate_python(devices)
+@router.get("/export", response_class=StreamingResponse)
+def export_devices(
+    *,
+    db: Session = Depends(dependencies.get_db),
+    current_user = Depends(dependencies.get_current_user_rw),
+    format: Literal["ndjson", "csv"] = "ndjson",
+) -> StreamingResponse:
+    """
+    Stream the whole device inventory as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and written out batch by batch,
+    so memory use does not depend on the table size.
+    """
+    batch_size = settings.EXPORT_BATCH_SIZE
+    fields = list(schemas.sql.Device.model_fields)
+
+    def ndjson_rows() -> Iterator[str]:
+        batch = []
+        for device in crud.sql.device.stream(db=db, batch_size=batch_size):
+            batch.append(schemas.sql.Device.model_validate(device).model_dump_json())
+            if len(batch) == batch_size:
+                yield "\n".join(batch) + "\n"
+                batch.clear()
+        if batch:
+            yield "\n".join(batch) + "\n"
+
+    def csv_rows() -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for i, device in enumerate(crud.sql.device.stream(db=db, batch_size=batch_size), start=1):
+            writer.writerow([getattr(device, field) for field in fields])
+            if i % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def body() -> Iterator[str]:
+        # get_db's teardown runs before the body is streamed, so release the connection
+        # the cursor checked out once streaming finishes or the client goes away.
+        try:
+            yield from (ndjson_rows() if format == "ndjson" else csv_rows())
+        finally:
+            db.close()
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="devices.{format}"'},
+    )
 
 
 @router.get("/{device_id}", response_model=schemas.sql.Device)
 def read_device(
     *,
-    db: Session = Depends(dependencies.get_db),
+    db: Session = Depends(dependencies.get_read_db),
     device_id: UUID,
     current_user = Depends(dependencies.get_current_user),
 ) -> Any:
@@ -0,0 +1,33 @@
+from typing import Any
+from fastapi import APIRouter, Depends
+
+from app import schemas
+from app import dependencies
+from app.core.config import settings
+from app.db.sql.pool import pool_stats
+from app.db.sql.session import async_engine, engine, replica_engines, replicas
+
+router = APIRouter()
+
+# Mounted in both modes, so authenticate through whichever session path is active
+current_superuser = (
+    dependencies.get_current_superuser_async if settings.SQLALCHEMY_ASYNC else dependencies.get_current_superuser
+)
+
+
+@router.get("/db-pool", response_model=schemas.sql.DatabasePoolStats)
+def read_db_pool_stats(
+    *,
+    superuser = Depends(current_superuser),
+) -> Any:
+    """
+    Live connection pool stats of this worker process.
+    """
+    return schemas.sql.DatabasePoolStats(
+        sync_engine=schemas.sql.PoolStats(**pool_stats(engine)),
+        async_engine=schemas.sql.PoolStats(**pool_stats(async_engine.sync_engine)),
+        replica_engines=[schemas.sql.PoolStats(**pool_stats(replica)) for replica in replica_engines],
+        replica_lag_seconds=[
+            None if lag == float("inf") else lag for _, lag in sorted(replicas.lag.items())
+        ],
+    )
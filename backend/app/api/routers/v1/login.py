@@ -9,7 +9,7 @@ from datetime import datetime, timedelta, timezone
 
 from app import crud, schemas, models
 from app import dependencies
-from app.core.security import verify_password, create_access_token
+from app.core.security import LoginQueueFull, login_slot, verify_and_update_password, create_access_token
 from app.core.config import settings
 
 router = APIRouter()
@@ -23,17 +23,29 @@ def login_access_token(
     OAuth2 compatible token login, get an access token for future requests
     """
     try:
-        user = crud.sql.user.read_by_column(db=session, column=models.sql.User.email, value=form_data.username)
+        with login_slot():
+            user = crud.sql.user.read_by_column(db=session, column=models.sql.User.email, value=form_data.username)
 
-        if not user:
-            raise HTTPException(status_code=400, detail="Incorrect email or password")
-        if not bool(user.is_active):
-            raise HTTPException(status_code=400, detail="Inactive User")
-        if not verify_password(form_data.password, str(user.hashed_password)):
-            raise HTTPException(status_code=400, detail="Incorrect email or password")
+            if not user:
+                raise HTTPException(status_code=400, detail="Incorrect email or password")
+            if not bool(user.is_active):
+                raise HTTPException(status_code=400, detail="Inactive User")
+            valid, new_hash = verify_and_update_password(form_data.password, str(user.hashed_password))
+            if not valid:
+                raise HTTPException(status_code=400, detail="Incorrect email or password")
+
+        if new_hash:
+            # Stored hash predates the current cost settings; upgrade it while we have the password
+            crud.sql.user.update(db=session, db_obj=user, obj_in={"hashed_password": new_hash})
 
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         return schemas.sql.Token(access_token=create_access_token(user.id, expires_delta=access_token_expires))
+    except LoginQueueFull:
+        raise HTTPException(
+            status_code=503, detail="Too many concurrent logins, retry shortly", headers={"Retry-After": "1"}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         # Convert the exception to a string to make it JSON serializable
         raise HTTPException(status_code=500, detail=str(e))
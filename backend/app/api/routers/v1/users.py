@@ -1,8 +1,7 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
 from fastapi.encoders import jsonable_encoder
-from pydantic import TypeAdapter
 from pydantic.networks import EmailStr
 from sqlalchemy.orm import Session
 
@@ -33,7 +32,7 @@ def create_user(
 @router.get("/me", response_model=schemas.sql.User)
 def read_me(
     *,
-    db: Session = Depends(dependencies.get_db),
+    db: Session = Depends(dependencies.get_read_db),
     current_user=Depends(dependencies.get_current_user),
 ) -> Any:
     me = crud.sql.user.read(db=db, id=current_user.id)
@@ -44,7 +43,29 @@ def read_me(
 def read_multi(
     *,
     db: Session = Depends(dependencies.get_db),
-    superuser = Depends(dependencies.get_current_superuser)
+    superuser = Depends(dependencies.get_current_superuser_rw),
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[crud.sql.CountMode] = None,
 ) -> Any:
-    read_multi_user = crud.sql.user.read_multi(db=db)
-    return TypeAdapter(List[schemas.sql.User]).validate_python(read_multi_user)
+    """
+    List users, with the same `cursor`, `filter`, `sort` and `count` parameters as the device list.
+    """
+    try:
+        query = crud.sql.user.parse_query(filters, sort)
+        read_multi_user, next_cursor = crud.sql.user.read_page(
+            db=db, cursor=cursor, offset=offset, limit=limit, query=query
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if count is not None:
+        headers["X-Total-Count"] = str(crud.sql.user.count(db=db, mode=count, query=query))
+        if count != "exact":
+            headers["X-Total-Count-Estimated"] = "true"
+    return Response(
+        schemas.sql.dump_json_list(schemas.sql.User, read_multi_user), media_type="application/json", headers=headers
+    )
@@ -0,0 +1,204 @@
+import csv
+import io
+from typing import Any, AsyncIterator, List, Literal, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+
+from app import crud, schemas, models
+from app import dependencies
+from app.core.config import settings
+
+router = APIRouter()
+
+# The create, list, bulk and search endpoints run the sync CRUD methods on the session's sync
+# core (`AsyncSession.run_sync`), so both paths share one implementation of keyset
+# pagination, filters, counts, upserts and search.
+
+
+@router.post("/", response_model=schemas.sql.Device, status_code=201)
+async def create_device(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    current_user = Depends(dependencies.get_current_user_async),
+    device_in: schemas.sql.DeviceCreate,
+):
+    def create(session):
+        # The sync CRUDBase.create, so a duplicate inserts nothing rather than racing an
+        # existence check, and the entity cache is invalidated on commit as on the sync path.
+        # Validated inside run_sync, before the committed instance can lazy-load.
+        device = crud.sql.device.create(
+            db=session,
+            obj_in=device_in,
+            on_conflict_do_nothing=[models.sql.Device.serial_number],
+        )
+        return None if device is None else schemas.sql.Device.model_validate(device)
+
+    try:
+        new_device = await db.run_sync(create)
+    except crud.sql.UniqueViolationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
+
+    if new_device is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Device with serial number '{device_in.serial_number}' already exists"
+        )
+    return new_device
+
+
+@router.post("/bulk", response_model=schemas.sql.DeviceBulkResult)
+async def bulk_upsert_devices(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    current_user = Depends(dependencies.get_current_user_async),
+    devices_in: List[schemas.sql.DeviceCreate] = Body(..., min_length=1, max_length=settings.BULK_MAX_ITEMS),
+    on_conflict: Literal["update", "skip"] = "update",
+) -> Any:
+    """
+    Create or update many devices keyed by serial number, as `POST /api/v1/devices/bulk`.
+    """
+    results = await db.run_sync(
+        lambda session: crud.sql.device.upsert_many(
+            db=session,
+            objs_in=devices_in,
+            index_elements=[models.sql.Device.serial_number],
+            update_existing=on_conflict == "update",
+            chunk_size=settings.BULK_CHUNK_SIZE,
+        )
+    )
+
+    items = [
+        schemas.sql.DeviceBulkItem(
+            index=index,
+            serial_number=device_in.serial_number,
+            status=status_,
+            id=row.id if row is not None else None,
+        )
+        for index, (device_in, (status_, row)) in enumerate(zip(devices_in, results))
+    ]
+    return schemas.sql.DeviceBulkResult(
+        inserted=sum(item.status == "inserted" for item in items),
+        updated=sum(item.status == "updated" for item in items),
+        conflicts=sum(item.status == "conflict" for item in items),
+        items=items,
+    )
+
+
+@router.get("/", response_model=List[schemas.sql.Device])
+async def read_devices(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    current_user = Depends(dependencies.get_current_user_async),
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[crud.sql.CountMode] = None,
+) -> Any:
+    """
+    List devices with the same `cursor`, `filter`, `sort` and `count` parameters as `GET /api/v1/devices/`.
+    """
+    try:
+        query = crud.sql.device.parse_query(filters, sort)
+        devices, next_cursor = await db.run_sync(
+            lambda session: crud.sql.device.read_page(
+                db=session, cursor=cursor, offset=offset, limit=limit, as_dicts=True, query=query
+            )
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if count is not None:
+        total = await db.run_sync(lambda session: crud.sql.device.count(db=session, mode=count, query=query))
+        headers["X-Total-Count"] = str(total)
+        if count != "exact":
+            headers["X-Total-Count-Estimated"] = "true"
+    return Response(
+        schemas.sql.dump_json_list(schemas.sql.Device, devices), media_type="application/json", headers=headers
+    )
+
+
+@router.get("/search", response_model=List[schemas.sql.Device])
+async def search_devices(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    current_user = Depends(dependencies.get_current_user_async),
+    q: str = Query(..., min_length=3, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    Find devices whose name, model or serial number contains `q`, most similar first.
+    """
+    devices = await db.run_sync(lambda session: crud.sql.device.search(db=session, q=q, limit=limit, as_dicts=True))
+    return Response(schemas.sql.dump_json_list(schemas.sql.Device, devices), media_type="application/json")
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_devices(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    current_user = Depends(dependencies.get_current_user_async),
+    format: Literal["ndjson", "csv"] = "ndjson",
+) -> StreamingResponse:
+    """
+    Stream the whole device inventory as NDJSON or CSV, through a server-side cursor.
+    """
+    batch_size = settings.EXPORT_BATCH_SIZE
+    fields = list(schemas.sql.Device.model_fields)
+
+    async def ndjson_rows() -> AsyncIterator[str]:
+        batch = []
+        async for device in crud.sql.device_async.stream(db=db, batch_size=batch_size):
+            batch.append(schemas.sql.Device.model_validate(device).model_dump_json())
+            if len(batch) == batch_size:
+                yield "\n".join(batch) + "\n"
+                batch.clear()
+        if batch:
+            yield "\n".join(batch) + "\n"
+
+    async def csv_rows() -> AsyncIterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        i = 0
+        async for device in crud.sql.device_async.stream(db=db, batch_size=batch_size):
+            writer.writerow([getattr(device, field) for field in fields])
+            i += 1
+            if i % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    async def body() -> AsyncIterator[str]:
+        # As in the sync route, the session outlives get_async_db's teardown while streaming
+        try:
+            async for chunk in ndjson_rows() if format == "ndjson" else csv_rows():
+                yield chunk
+        finally:
+            await db.close()
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="devices.{format}"'},
+    )
+
+
+@router.get("/{device_id}", response_model=schemas.sql.Device)
+async def read_device(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    device_id: UUID,
+    current_user = Depends(dependencies.get_current_user_async),
+) -> Any:
+    device = await crud.sql.device_async.read(db=db, id=device_id)
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
+    return schemas.sql.Device.model_validate(device)
@@ -0,0 +1,46 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from datetime import timedelta
+
+from app import crud, schemas, models
+from app import dependencies
+from app.core.security import LoginQueueFull, login_slot, verify_and_update_password_async, create_access_token
+from app.core.config import settings
+
+router = APIRouter()
+
+
+@router.post("/access-token")
+async def login_access_token(
+    session: dependencies.AsyncSessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+) -> schemas.sql.Token:
+    """
+    OAuth2 compatible token login, get an access token for future requests
+    """
+    try:
+        with login_slot():
+            user = await crud.sql.user_async.read_by_column(db=session, column=models.sql.User.email, value=form_data.username)
+
+            if not user:
+                raise HTTPException(status_code=400, detail="Incorrect email or password")
+            if not bool(user.is_active):
+                raise HTTPException(status_code=400, detail="Inactive User")
+            valid, new_hash = await verify_and_update_password_async(form_data.password, str(user.hashed_password))
+            if not valid:
+                raise HTTPException(status_code=400, detail="Incorrect email or password")
+
+        if new_hash:
+            # Stored hash predates the current cost settings; upgrade it while we have the password
+            await crud.sql.user_async.update(db=session, db_obj=user, obj_in={"hashed_password": new_hash})
+
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        return schemas.sql.Token(access_token=create_access_token(user.id, expires_delta=access_token_expires))
+    except LoginQueueFull:
+        raise HTTPException(
+            status_code=503, detail="Too many concurrent logins, retry shortly", headers={"Retry-After": "1"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,67 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, schemas, models
+from app import dependencies
+
+router = APIRouter()
+
+
+@router.post("/", response_model=schemas.sql.User, status_code=201)
+async def create_user(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    user_in: schemas.sql.UserCreate,
+) -> Any:
+
+    if await crud.sql.user_async.read_by_column(db=db, column=models.sql.User.email, value=user_in.email):
+        raise HTTPException(status_code=400, detail="User already exists")
+
+    new_user = await crud.sql.user_async.create(db=db, obj_in=user_in)
+    return schemas.sql.User.model_validate(new_user)
+
+
+@router.get("/me", response_model=schemas.sql.User)
+async def read_me(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    current_user=Depends(dependencies.get_current_user_async),
+) -> Any:
+    me = await crud.sql.user_async.read(db=db, id=current_user.id)
+    return schemas.sql.User.model_validate(me)
+
+
+@router.get("/read_multi", response_model=List[schemas.sql.User])
+async def read_multi(
+    *,
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    superuser = Depends(dependencies.get_current_superuser_async),
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[crud.sql.CountMode] = None,
+) -> Any:
+    """
+    List users, with the same `cursor`, `filter`, `sort` and `count` parameters as the device list.
+    """
+    try:
+        query = crud.sql.user.parse_query(filters, sort)
+        read_multi_user, next_cursor = await db.run_sync(
+            lambda session: crud.sql.user.read_page(
+                db=session, cursor=cursor, offset=offset, limit=limit, query=query
+            )
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if count is not None:
+        total = await db.run_sync(lambda session: crud.sql.user.count(db=session, mode=count, query=query))
+        headers["X-Total-Count"] = str(total)
+        if count != "exact":
+            headers["X-Total-Count-Estimated"] = "true"
+    return Response(
+        schemas.sql.dump_json_list(schemas.sql.User, read_multi_user), media_type="application/json", headers=headers
+    )
@@ -0,0 +1,173 @@
+"""
+Boot pipeline
+=============
+
+Prepares the database before the server starts (see pre-start.sh):
+
+1. `wait`: retries `SELECT 1` with exponential backoff until the database answers.
+2. `migrate`: compares the database's Alembic revision with the scripts' head and only
+   upgrades when it is behind.
+3. `seed`: creates the first superuser unless it exists. The check runs first, so an
+   already seeded database never pays for a bcrypt hash.
+
+When many containers start at once, migrating and seeding are serialized with a Postgres
+advisory lock. Each step checks again once it holds the lock, so only the first container
+does the work; the others find it done and move on. A container that already sees the
+database at head and seeded never takes the lock.
+
+Every phase logs its duration, and a summary line closes the run:
+
+    python -m app.boot
+    python -m app.boot --skip-seed
+"""
+
+import argparse
+import logging
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection, Engine, create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from tenacity import before_sleep_log, retry, stop_after_delay, wait_exponential
+
+from app import crud, models
+from app.core.config import settings
+from app.seed.init_db import init_sql
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[1] / "alembic.ini"
+
+# Key of the session-level advisory lock held while migrating or seeding
+BOOT_LOCK_KEY = zlib.crc32(b"app.boot")
+
+
+def create_boot_engine(url: Optional[str] = None) -> Engine:
+    # One short-lived connection at a time; no pool to keep around after boot
+    return create_engine(
+        url or str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool, connect_args={"connect_timeout": 5}
+    )
+
+
+def wait_for_database(engine: Engine) -> None:
+    @retry(
+        stop=stop_after_delay(settings.BOOT_DB_WAIT_TIMEOUT_SECONDS),
+        wait=wait_exponential(multiplier=0.1, max=settings.BOOT_DB_WAIT_MAX_INTERVAL_SECONDS),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+    def _ping() -> None:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    _ping()
+
+
+@contextmanager
+def advisory_lock(engine: Engine, key: int = BOOT_LOCK_KEY) -> Iterator[Connection]:
+    """
+    Hold the session-level advisory lock `key` for the block, waiting at most
+    BOOT_LOCK_TIMEOUT_SECONDS for another holder.
+    """
+    with engine.connect() as connection:
+        connection.execute(text(f"SET lock_timeout = {int(settings.BOOT_LOCK_TIMEOUT_SECONDS * 1000)}"))
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+        connection.commit()
+        try:
+            yield connection
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+            connection.commit()
+
+
+def alembic_config() -> Config:
+    # Keep env.py from replacing our logging setup with alembic.ini's
+    return Config(str(ALEMBIC_INI), attributes={"configure_logger": False})
+
+
+def pending_migrations(engine: Engine, config: Config) -> bool:
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    return current != heads
+
+
+def migrate(engine: Engine) -> str:
+    config = alembic_config()
+    if not pending_migrations(engine, config):
+        return "at head"
+    with advisory_lock(engine):
+        if not pending_migrations(engine, config):
+            return "at head after waiting for another container"
+        command.upgrade(config, "head")
+    return "upgraded to head"
+
+
+def superuser_exists(engine: Engine) -> bool:
+    with Session(engine) as db:
+        user = crud.sql.user.read_by_column(
+            db, column=models.sql.User.email, value=settings.FIRST_SUPERUSER_USERNAME
+        )
+    return user is not None
+
+
+def seed(engine: Engine) -> str:
+    if superuser_exists(engine):
+        return "already seeded"
+    with advisory_lock(engine):
+        if superuser_exists(engine):
+            return "seeded by another container"
+        with Session(engine) as db:
+            init_sql(db)
+    return "seeded"
+
+
+def run_phase(name: str, phase: Callable[[], Optional[str]], timings: Dict[str, float]) -> None:
+    start = time.perf_counter()
+    outcome = phase()
+    timings[name] = time.perf_counter() - start
+    logger.info("Boot phase %s: %s in %.2fs", name, outcome or "done", timings[name])
+
+
+def boot(skip_migrations: bool = False, skip_seed: bool = False, engine: Optional[Engine] = None) -> Dict[str, float]:
+    """
+    Run the boot phases in order and return each one's duration in seconds.
+    """
+    engine = engine or create_boot_engine()
+    timings: Dict[str, float] = {}
+    try:
+        run_phase("wait", lambda: wait_for_database(engine), timings)
+        if not skip_migrations:
+            run_phase("migrate", lambda: migrate(engine), timings)
+        if not skip_seed:
+            run_phase("seed", lambda: seed(engine), timings)
+    finally:
+        engine.dispose()
+    logger.info(
+        "Boot finished in %.2fs (%s)",
+        sum(timings.values()),
+        ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()),
+    )
+    return timings
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.boot", description=__doc__.split("\n\n")[1])
+    parser.add_argument("--skip-migrations", action="store_true", help="Do not run Alembic migrations")
+    parser.add_argument("--skip-seed", action="store_true", help="Do not create the first superuser")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    boot(skip_migrations=args.skip_migrations, skip_seed=args.skip_seed)
+
+
+if __name__ == "__main__":
+    main()
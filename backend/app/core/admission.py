@@ -0,0 +1,180 @@
+"""
+Admission control
+=================
+
+When Postgres slows down, requests pile up behind the connection pool (DB_POOL_TIMEOUT)
+and the threadpool fills with work that will time out anyway. `AdmissionMiddleware`
+bounds how much work each worker takes on, per priority class:
+
+- `login`: `POST /login/access-token`, at most LOGIN_QUEUE_SIZE at once. The routes'
+  `security.login_slot` enforces the same bound when admission control is disabled. This is the only cap on concurrent logins, and so
+  on the bcrypt work queued for the hashing processes.
+- `admin`: superuser routes (`/internal/*`, `GET /users/read_multi`).
+- `bulk`: device bulk upserts and exports.
+- `default`: every other API route.
+
+Each class has its own concurrency limit and its own bounded FIFO wait queue. A request
+starts when its class has a free slot. Otherwise it waits for at most
+ADMISSION_MAX_WAIT_SECONDS, and is shed at once when the queue already holds
+ADMISSION_QUEUE_SIZE requests. Shed requests get a 503 with `Retry-After` straight away
+instead of a timeout much later. Since the classes do not share slots, a flood of bulk
+device traffic cannot keep logins or superuser requests waiting.
+
+Routes outside the API (`/metrics`, docs) are never limited. The limits are per worker,
+like the connection pool: a class without its own limit gets the worker's pool share
+(pool_size + max_overflow). Each request holds at most one connection, so admitted requests
+should not wait long for one.
+Exported: `admission_in_flight_requests`, `admission_queue_depth`, `admission_wait_seconds`
+and `admission_shed_total` (by reason: `queue_full` or `timeout`).
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+
+from app.core import metrics
+
+# (priority class, HTTP method or None for any, path below API_V1_STR; a trailing "/" matches a prefix)
+PRIORITY_ROUTES: Tuple[Tuple[str, Optional[str], str], ...] = (
+    ("login", "POST", "/login/access-token"),
+    ("admin", None, "/internal/"),
+    ("admin", "GET", "/users/read_multi"),
+    ("bulk", "POST", "/devices/bulk"),
+    ("bulk", "GET", "/devices/export"),
+)
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded FIFO queue, for use on one event loop.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, max_wait: float):
+        self.name = name
+        self.concurrency = max(concurrency, 1)
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """
+        Take a slot, waiting in the queue if need be.
+
+        Returns:
+            Optional[str]: None once admitted, or why the request is shed ("queue_full", "timeout").
+        """
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        metrics.ADMISSION_QUEUE_DEPTH.labels(self.name).inc()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            # `release` may have handed over the slot just as the wait ran out
+            if waiter.done() and not waiter.cancelled():
+                return None
+            return "timeout"
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            metrics.ADMISSION_QUEUE_DEPTH.labels(self.name).dec()
+        return None
+
+    def release(self) -> None:
+        # The slot passes straight to the oldest waiter, so `active` only drops when none is left
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware limiting concurrent requests per priority class; see the module docstring.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        prefix: str,
+        limits: Dict[str, int],
+        queue_size: int,
+        max_wait: float,
+        retry_after: int,
+        routes: Sequence[Tuple[str, Optional[str], str]] = PRIORITY_ROUTES,
+    ):
+        self.app = app
+        self.prefix = prefix
+        self.routes = routes
+        self.retry_after = retry_after
+        self.gates = {
+            name: AdmissionGate(name, concurrency, queue_size, max_wait) for name, concurrency in limits.items()
+        }
+
+    def priority(self, method: str, path: str) -> Optional[str]:
+        if not path.startswith(self.prefix):
+            return None
+        path = path[len(self.prefix):]
+        for name, route_method, route_path in self.routes:
+            if route_method not in (None, method):
+                continue
+            if path == route_path or (route_path.endswith("/") and path.startswith(route_path)):
+                return name
+        return "default"
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        gate = self.gates.get(self.priority(scope["method"], scope["path"]) or "")
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        shed_reason = await gate.acquire()
+        metrics.ADMISSION_WAIT.labels(gate.name).observe(time.perf_counter() - start)
+        if shed_reason is not None:
+            metrics.ADMISSION_SHED.labels(gate.name, shed_reason).inc()
+            await self._reject(send)
+            return
+
+        metrics.ADMISSION_IN_FLIGHT.labels(gate.name).inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            metrics.ADMISSION_IN_FLIGHT.labels(gate.name).dec()
+            gate.release()
+
+    async def _reject(self, send: Any) -> None:
+        body = json.dumps({"detail": "Server busy, retry shortly"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,144 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Thread-safe, bounded in-process cache.
+
+    Entries are evicted least-recently-used first once `maxsize` is reached and expire
+    `ttl` seconds after they were stored. A `maxsize` or `ttl` of 0 disables the cache.
+    Hit and miss counters are kept for monitoring and, for a named cache, exported to `metrics`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or now - entry[0] >= self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                hit = False
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                hit = True
+        if self.name:
+            metrics.CACHE_REQUESTS.labels(self.name, "hit" if hit else "miss").inc()
+        return entry[1] if hit else default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        # Same interface as `EntityCache.invalidate`, so writes can defer it (`defer_invalidation`)
+        for key in keys:
+            self.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class RedisCache:
+    """
+    Cache shared by all workers, stored in Redis (or anything speaking its protocol).
+
+    Same interface as `LRUCache`, for string keys. Values are stored as JSON, so UUIDs and
+    datetimes come back as strings and callers convert them. Entries expire after `ttl`
+    seconds; `maxsize` is left to Redis' eviction policy. Redis errors are logged and
+    treated as misses, so an outage degrades to reading from the database.
+    """
+
+    def __init__(self, client: Any, ttl: float, prefix: str = "cache:", name: Optional[str] = None):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float, **kwargs: Any) -> "RedisCache":
+        import redis
+
+        return cls(redis.Redis.from_url(url, socket_timeout=1), ttl, **kwargs)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            logger.warning("Redis GET failed, treating %s as a miss", key, exc_info=True)
+            raw = None
+        hit = raw is not None
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.name:
+            metrics.CACHE_REQUESTS.labels(self.name, "hit" if hit else "miss").inc()
+        return json.loads(raw) if hit else default
+
+    def set(self, key: str, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        try:
+            self.client.set(self.prefix + key, json.dumps(jsonable_encoder(value)), px=int(self.ttl * 1000))
+        except Exception:
+            logger.warning("Redis SET failed for %s", key, exc_info=True)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception:
+            # The entry stays until its TTL runs out
+            logger.warning("Redis DEL failed for %s", key, exc_info=True)
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.delete(key)
+
+    def clear(self) -> None:
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + "*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception:
+            logger.warning("Redis clear failed for prefix %s", self.prefix, exc_info=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
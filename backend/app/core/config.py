@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 
-from typing import Any, List, Optional, Annotated
+from typing import Any, List, Literal, Optional, Annotated
 from pydantic import (
     AnyUrl,
     AnyHttpUrl,
@@ -48,6 +48,67 @@ class Settings(BaseSettings):
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
 
+    # Authenticated principals cached per worker, keyed by token subject (0 disables)
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+
+    # bcrypt cost for new hashes. When unset, it is calibrated at startup so one hash takes
+    # about PASSWORD_HASH_TARGET_MS on this machine, never below PASSWORD_BCRYPT_MIN_ROUNDS.
+    # `python -m app.server` calibrates once and passes the result to every worker.
+    PASSWORD_BCRYPT_ROUNDS: Optional[int] = None
+    # Set by the launcher along with a calibrated PASSWORD_BCRYPT_ROUNDS: the cost then only
+    # upgrades existing hashes, instead of being enforced exactly like a pinned one
+    PASSWORD_BCRYPT_ROUNDS_CALIBRATED: bool = False
+    PASSWORD_BCRYPT_MIN_ROUNDS: int = 10
+    PASSWORD_HASH_TARGET_MS: float = 250
+    # Processes per web worker for bcrypt hashing (0 hashes in the request thread)
+    PASSWORD_HASH_WORKERS: int = 2
+    # Logins in flight per web worker; further attempts get a 503 instead of queueing. Holds
+    # with or without admission control, whose login class never admits more than this.
+    LOGIN_QUEUE_SIZE: int = 16
+
+    # Admission control (app/core/admission.py): requests served at once per worker for each
+    # priority class; a class left at None gets the worker's connection pool share. Requests
+    # over the limit wait in a queue of at most ADMISSION_QUEUE_SIZE per class for up to
+    # ADMISSION_MAX_WAIT_SECONDS, then get a 503 with Retry-After: ADMISSION_RETRY_AFTER_SECONDS.
+    # The login class is capped at LOGIN_QUEUE_SIZE, so the two login limits never disagree.
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_LOGIN_CONCURRENCY: int = 8
+    ADMISSION_ADMIN_CONCURRENCY: int = 4
+    ADMISSION_BULK_CONCURRENCY: int = 2
+    ADMISSION_DEFAULT_CONCURRENCY: Optional[int] = None
+    ADMISSION_QUEUE_SIZE: int = 64
+    ADMISSION_MAX_WAIT_SECONDS: float = 2
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Bulk endpoints: max entries per request and rows per multi-row INSERT
+    BULK_MAX_ITEMS: int = 10_000
+    BULK_CHUNK_SIZE: int = 1000
+    # Rows per server-side cursor fetch (and per response chunk) for streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Read-through cache for CRUD reads by id and unique columns ("none", "memory" or "redis").
+    # "memory" keeps one LRU per worker, kept coherent across workers through Postgres
+    # NOTIFY on ENTITY_CACHE_CHANNEL; "redis" shares ENTITY_CACHE_REDIS_URL between workers.
+    # "Does not exist" answers are cached for ENTITY_CACHE_NEGATIVE_TTL_SECONDS.
+    ENTITY_CACHE_BACKEND: Literal["none", "memory", "redis"] = "none"
+    ENTITY_CACHE_SIZE: int = 10_000
+    ENTITY_CACHE_TTL_SECONDS: float = 60
+    ENTITY_CACHE_NEGATIVE_TTL_SECONDS: float = 5
+    ENTITY_CACHE_REDIS_URL: Optional[str] = None
+    ENTITY_CACHE_CHANNEL: str = "entity_cache"
+
+    # `count=cached` totals on list endpoints: exact counts reused for COUNT_CACHE_TTL_SECONDS,
+    # per worker and per distinct filter
+    COUNT_CACHE_SIZE: int = 1000
+    COUNT_CACHE_TTL_SECONDS: float = 30
+
+    # Development aid: warn about requests issuing more than QUERY_AUDIT_MAX_STATEMENTS
+    # statements or repeating one statement QUERY_AUDIT_REPEAT_THRESHOLD times (N+1)
+    QUERY_AUDIT_ENABLED: bool = False
+    QUERY_AUDIT_MAX_STATEMENTS: int = 20
+    QUERY_AUDIT_REPEAT_THRESHOLD: int = 5
+
     SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
 
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
@@ -64,6 +125,63 @@ class Settings(BaseSettings):
             return f"postgresql://{user}:{password}@{host}/{db}"
         return None
 
+    # Server launcher (`python -m app.server`): listen address, idle keep-alive timeout,
+    # listen backlog, and how long SIGTERM waits for requests in flight
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 80
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+
+    # Connection pools: WEB_CONCURRENCY worker processes (also read by uvicorn; the launcher
+    # sets it from the CPUs available when it is not set) share a budget
+    # of DB_CONNECTION_BUDGET Postgres connections; DB_POOL_OVERFLOW_RATIO of each worker's
+    # share is overflow, opened only under load.
+    WEB_CONCURRENCY: int = 4
+    DB_CONNECTION_BUDGET: int = 80
+    DB_POOL_OVERFLOW_RATIO: float = 0.25
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Connections each worker opens at startup (capped at its pool size)
+    DB_POOL_WARMUP: int = 0
+
+    # Boot pipeline (`python -m app.boot`): the wait for the database backs off exponentially,
+    # up to BOOT_DB_WAIT_MAX_INTERVAL_SECONDS between attempts, and gives up after
+    # BOOT_DB_WAIT_TIMEOUT_SECONDS. Containers starting together wait at most BOOT_LOCK_TIMEOUT_SECONDS
+    # for the one that is migrating or seeding.
+    BOOT_DB_WAIT_TIMEOUT_SECONDS: float = 300
+    BOOT_DB_WAIT_MAX_INTERVAL_SECONDS: float = 5
+    BOOT_LOCK_TIMEOUT_SECONDS: float = 600
+
+    # Streaming replicas for read-only sessions (comma separated URLs). The workers share a
+    # budget of DB_REPLICA_CONNECTION_BUDGET connections on each replica. A replica lagging more
+    # than DB_REPLICA_MAX_LAG_SECONDS (measured in the background every DB_REPLICA_LAG_CHECK_SECONDS)
+    # is skipped, and a user's reads stay on the primary for DB_READ_YOUR_WRITES_SECONDS after they write.
+    DB_REPLICA_URLS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    DB_REPLICA_CONNECTION_BUDGET: int = 80
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 2
+    DB_READ_YOUR_WRITES_SECONDS: float = 5
+
+    # Serve the v1 routers from the native async (asyncpg) path instead of the
+    # threadpool-backed sync path. Both stay available so they can be benchmarked. The async
+    # routers always read from the primary in read-write sessions: read-only sessions and
+    # replica routing are sync-only.
+    SQLALCHEMY_ASYNC: bool = False
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[PostgresDsn] = None
+
+    @field_validator("SQLALCHEMY_ASYNC_DATABASE_URI", mode="before")
+    @classmethod
+    def assemble_async_db_connection(cls, v: Optional[str], info: ValidationInfo) -> Any:
+        if isinstance(v, str):
+            return v
+        sync_uri = info.data.get("SQLALCHEMY_DATABASE_URI")
+        if sync_uri is None:
+            return None
+        _, rest = str(sync_uri).split("://", 1)
+        return f"postgresql+asyncpg://{rest}"
+
     BACKEND_CORS_ORIGINS: Annotated[list[AnyUrl] | str, BeforeValidator(parse_cors)] = (
         []
     )
@@ -0,0 +1,202 @@
+"""
+Prometheus metrics
+==================
+
+Every metric the service exports is declared here and rendered at `/metrics`.
+
+Multiprocess mode:
+------------------
+uvicorn runs several worker processes and a scrape only reaches one of them. When
+`PROMETHEUS_MULTIPROC_DIR` is set (pre-start.sh does this), every worker writes its
+samples to files in that directory and `/metrics` aggregates all of them. The directory
+must be emptied before the workers start (it is created on import if missing), and the
+variable must be set before `prometheus_client` is first imported.
+
+What is recorded:
+-----------------
+- `http_request_duration_seconds` / `http_requests_total`: per route template and status (`MetricsMiddleware`).
+- `db_queries_total` / `db_query_duration_seconds`: per route, from engine events (`install_sqlalchemy_hooks`).
+- `db_pool_checkout_wait_seconds` and pool gauges: from `app.db.sql.pool`.
+- `db_read_routes_total` / `db_replica_lag_seconds`: read routing between primary and replicas (`app.db.sql.replicas`).
+- `password_hash_duration_seconds`: bcrypt work in `app.core.security`, including time queued for a hashing process.
+- `admission_*`: slots in use, queue depth, wait time and shed requests per priority class (`app.core.admission`).
+- `cache_requests_total`: hits and misses of named in-process caches.
+- `entity_cache_*`: the CRUD entity cache (`app.crud.sql.entity_cache`). Hit rate is
+  `hit + negative_hit` over all requests; `entity_cache_hit_age_seconds` shows how old the
+  entries served are and `entity_cache_invalidation_lag_seconds` how long peers take to drop
+  keys another worker invalidated.
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The metrics below open their sample files as soon as they are declared
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+REQUEST_COUNT = Counter(
+    "http_requests_total", "HTTP requests by status", ["method", "route", "status"]
+)
+DB_QUERY_COUNT = Counter(
+    "db_queries_total", "SQL statements executed", ["route"]
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ["route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out", ["pool"], multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections", "Overflow connections currently open", ["pool"], multiprocess_mode="livesum"
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds", "bcrypt hash / verify latency", ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "In-process cache lookups", ["cache", "result"]
+)
+DB_READ_ROUTES = Counter(
+    "db_read_routes_total", "Read-only sessions by target engine and reason", ["target", "reason"]
+)
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds", "Last measured replay lag per replica", ["replica"], multiprocess_mode="max"
+)
+ENTITY_CACHE_REQUESTS = Counter(
+    "entity_cache_requests_total", "Entity cache lookups (hit, negative_hit, miss)", ["entity", "result"]
+)
+ENTITY_CACHE_HIT_AGE = Histogram(
+    "entity_cache_hit_age_seconds", "Age of entity cache entries when served", ["entity"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+ENTITY_CACHE_INVALIDATIONS = Counter(
+    "entity_cache_invalidations_total", "Entity cache keys invalidated", ["source"]
+)
+ENTITY_CACHE_INVALIDATION_LAG = Histogram(
+    "entity_cache_invalidation_lag_seconds", "Delay between a write's NOTIFY and a peer dropping the keys",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight_requests", "Requests admitted and being served", ["priority"], multiprocess_mode="livesum"
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot", ["priority"], multiprocess_mode="livesum"
+)
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds", "Time spent waiting for an admission slot, admitted or shed", ["priority"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+ADMISSION_SHED = Counter(
+    "admission_shed_total", "Requests rejected with 503 by admission control", ["priority", "reason"]
+)
+
+# ASGI scope of the request being served; SQLAlchemy events read the matched route from it
+current_request_scope: ContextVar[Optional[dict]] = ContextVar("current_request_scope", default=None)
+
+
+def route_label(scope: Optional[dict]) -> str:
+    """
+    Route template (e.g. `/api/v1/devices/{device_id}`) rather than the raw path, to keep label cardinality bounded.
+    """
+    if scope is None:
+        return "none"
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency and status of every HTTP request.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = current_request_scope.set(scope)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_label(scope)
+            REQUEST_LATENCY.labels(scope["method"], route).observe(time.perf_counter() - start)
+            REQUEST_COUNT.labels(scope["method"], route, str(status_code)).inc()
+            current_request_scope.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_start_time"].pop()
+    route = route_label(current_request_scope.get())
+    DB_QUERY_COUNT.labels(route).inc()
+    DB_QUERY_LATENCY.labels(route).observe(time.perf_counter() - started)
+
+
+def install_sqlalchemy_hooks() -> None:
+    """
+    Count and time statements on every engine (sync and the sync core of async engines).
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def observe_pool(pool: str, checked_out: int, overflow: int) -> None:
+    DB_POOL_CHECKED_OUT.labels(pool).set(checked_out)
+    DB_POOL_OVERFLOW.labels(pool).set(max(overflow, 0))
+
+
+def render() -> bytes:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead() -> None:
+    """
+    Drop this worker's live gauges from the multiprocess aggregate on shutdown.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
@@ -0,0 +1,66 @@
+"""
+Debug-time query audit
+======================
+
+When `QUERY_AUDIT_ENABLED` is set, `QueryAuditMiddleware` collects the statements each
+HTTP request executes and logs a warning if the request issued more than
+`QUERY_AUDIT_MAX_STATEMENTS`, or repeated one statement shape at least
+`QUERY_AUDIT_REPEAT_THRESHOLD` times (the usual sign of an N+1 loop).
+
+It is meant for development; the per-statement bookkeeping is not free.
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db.sql.query_counter import repeated_shapes
+
+logger = logging.getLogger(__name__)
+
+# Statements of the request being served; a list shared with the threadpool copies of the context
+_request_statements: ContextVar[Optional[List[str]]] = ContextVar("request_statements", default=None)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    statements = _request_statements.get()
+    if statements is not None:
+        statements.append(statement)
+
+
+class QueryAuditMiddleware:
+    """
+    Pure ASGI middleware warning about requests with too many or repeated statements.
+    """
+
+    def __init__(self, app: Any, max_statements: int, repeat_threshold: int):
+        self.app = app
+        self.max_statements = max_statements
+        self.repeat_threshold = repeat_threshold
+        if not event.contains(Engine, "before_cursor_execute", _record_statement):
+            event.listen(Engine, "before_cursor_execute", _record_statement)
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statements: List[str] = []
+        token = _request_statements.set(statements)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_statements.reset(token)
+            self._report(scope, statements)
+
+    def _report(self, scope: dict, statements: List[str]) -> None:
+        request = f"{scope['method']} {scope['path']}"
+        if len(statements) > self.max_statements:
+            logger.warning(
+                "%s executed %s SQL statements (limit %s)", request, len(statements), self.max_statements
+            )
+        for shape, count in repeated_shapes(statements, self.repeat_threshold).items():
+            logger.warning("%s repeated a statement %s times, possible N+1: %s", request, count, shape)
@@ -1,12 +1,30 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterator, Optional, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 
+from app.core import metrics
+from app.core.cache import LRUCache
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# id / is_active / is_superuser of authenticated users, keyed by token subject.
+# CRUDUser invalidates entries on writes; the TTL bounds staleness across workers.
+principal_cache = LRUCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS, name="principal"
+)
+
 ALGORITHM = "HS256"
 
 
@@ -16,9 +34,194 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+
+# Hashes below the configured cost report `needs_update`, so logins upgrade them in place.
+BCRYPT_MAX_ROUNDS = 16
+_password_rounds: Optional[Tuple[int, bool]] = None
+_password_rounds_lock = threading.Lock()
+
+
+def configure_password_context(rounds: int, exact: bool = False) -> None:
+    """
+    Hash new passwords with `rounds` and flag cheaper hashes for an update on verify.
+    With `exact`, more expensive hashes are flagged too so cost can be tuned downwards.
+    """
+    options: dict = {
+        "schemes": ["bcrypt"],
+        "deprecated": "auto",
+        "bcrypt__default_rounds": rounds,
+        "bcrypt__min_rounds": rounds,
+    }
+    if exact:
+        options["bcrypt__max_rounds"] = rounds
+    pwd_context.load(options)
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int = 4) -> int:
+    """
+    Pick the bcrypt cost whose hash time is closest to `target_ms` on this machine.
+
+    Times a cheap cost and extrapolates: each extra round doubles the work.
+    """
+    probe_rounds = 6
+    probe = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=probe_rounds)
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        probe.hash("calibration")
+        samples.append(time.perf_counter() - start)
+    probe_ms = sorted(samples)[1] * 1000
+    rounds = probe_rounds + round(math.log2(max(target_ms, 1) / max(probe_ms, 1e-3)))
+    return max(min_rounds, min(rounds, BCRYPT_MAX_ROUNDS))
+
+
+def ensure_password_rounds() -> int:
+    """
+    Return the bcrypt cost for new hashes, configuring `pwd_context` on first call.
+
+    A pinned PASSWORD_BCRYPT_ROUNDS is enforced exactly. Otherwise the cost is calibrated,
+    normally once by the launcher for all workers (PASSWORD_BCRYPT_ROUNDS_CALIBRATED), else
+    here, and stored back into `settings`. Calibrated costs only ever upgrade existing hashes,
+    so hosts whose measurements differ by a round do not keep rehashing each other's output.
+    """
+    global _password_rounds
+    with _password_rounds_lock:
+        if _password_rounds is None:
+            if settings.PASSWORD_BCRYPT_ROUNDS is not None:
+                _password_rounds = (settings.PASSWORD_BCRYPT_ROUNDS, not settings.PASSWORD_BCRYPT_ROUNDS_CALIBRATED)
+            else:
+                rounds = calibrate_bcrypt_rounds(
+                    settings.PASSWORD_HASH_TARGET_MS, settings.PASSWORD_BCRYPT_MIN_ROUNDS
+                )
+                settings.PASSWORD_BCRYPT_ROUNDS = rounds
+                logger.info(
+                    "Calibrated bcrypt cost to %s rounds for a %sms target", rounds, settings.PASSWORD_HASH_TARGET_MS
+                )
+                _password_rounds = (rounds, False)
+            configure_password_context(*_password_rounds)
+        return _password_rounds[0]
+
+
+# bcrypt is a CPU-bound burst of ~200ms per call. Running it in a small process pool keeps
+# it from competing for the GIL with request handling in the web worker.
+_hashing_executor: Optional[Executor] = None
+_hashing_executor_lock = threading.Lock()
+
+# Logins in flight per worker (running or waiting for a hashing process)
+_login_slots = threading.BoundedSemaphore(max(settings.LOGIN_QUEUE_SIZE, 1))
+
+
+class LoginQueueFull(Exception):
+    pass
+
+
+def get_hashing_executor() -> Optional[Executor]:
+    """
+    Process pool used for password hashing, created on first use.
+    None when PASSWORD_HASH_WORKERS is 0, in which case hashing runs in the calling thread.
+    """
+    global _hashing_executor
+    ensure_password_rounds()
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _hashing_executor_lock:
+        if _hashing_executor is None:
+            # spawn: forking a multi-threaded server process is not safe
+            _hashing_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configure_password_context,
+                initargs=_password_rounds,
+            )
+        return _hashing_executor
+
+
+def shutdown_hashing_executor() -> None:
+    global _hashing_executor
+    with _hashing_executor_lock:
+        if _hashing_executor is not None:
+            # Waits for the hashes already running. Without waiting, a worker process that
+            # exits right after (uvicorn's do, skipping atexit) never tells the pool's
+            # processes to stop, and they outlive it
+            _hashing_executor.shutdown(wait=True, cancel_futures=True)
+            _hashing_executor = None
+
+
+@contextmanager
+def login_slot() -> Iterator[None]:
+    """
+    Reserve one of LOGIN_QUEUE_SIZE login slots without waiting.
+
+    Raises:
+        LoginQueueFull: If every slot is taken.
+    """
+    if not _login_slots.acquire(blocking=False):
+        raise LoginQueueFull()
+    try:
+        yield
+    finally:
+        _login_slots.release()
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def _get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    executor = get_hashing_executor()
+    with metrics.PASSWORD_HASH_LATENCY.labels("verify").time():
+        if executor is None:
+            return _verify_password(plain_password, hashed_password)
+        return executor.submit(_verify_password, plain_password, hashed_password).result()
+
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    executor = get_hashing_executor()
+    with metrics.PASSWORD_HASH_LATENCY.labels("hash").time():
+        if executor is None:
+            return _get_password_hash(password)
+        return executor.submit(_get_password_hash, password).result()
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, when its hash uses outdated parameters, return a replacement hash.
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matched, and the new hash to store (or None).
+    """
+    executor = get_hashing_executor()
+    with metrics.PASSWORD_HASH_LATENCY.labels("verify").time():
+        if executor is None:
+            return _verify_and_update_password(plain_password, hashed_password)
+        return executor.submit(_verify_and_update_password, plain_password, hashed_password).result()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    # With no process pool this falls back to the event loop's default thread pool
+    with metrics.PASSWORD_HASH_LATENCY.labels("verify").time():
+        return await asyncio.get_running_loop().run_in_executor(
+            get_hashing_executor(), _verify_password, plain_password, hashed_password
+        )
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    with metrics.PASSWORD_HASH_LATENCY.labels("verify").time():
+        return await asyncio.get_running_loop().run_in_executor(
+            get_hashing_executor(), _verify_and_update_password, plain_password, hashed_password
+        )
+
+
+async def get_password_hash_async(password: str) -> str:
+    with metrics.PASSWORD_HASH_LATENCY.labels("hash").time():
+        return await asyncio.get_running_loop().run_in_executor(
+            get_hashing_executor(), _get_password_hash, password
+        )
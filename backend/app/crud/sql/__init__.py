@@ -1,2 +1,5 @@
-from .crud_user import user
-from .crud_device import device
+from .crud_user import user, user_async
+from .crud_device import device, device_async
+from .base import CountMode, UniqueViolationError
+from .query_spec import InvalidQuerySpecError
+from .unit_of_work import transaction
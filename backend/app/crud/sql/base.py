@@ -16,12 +16,13 @@ Key Changes and Best Practices for SQLAlchemy 2.0:
    - `.scalars().all()` returns all results as a Sequence (cast to `list()` for type safety).
 
 3. Creating Objects:
-   - Use `db.add(obj)`, `db.commit()`, and `db.refresh(obj)` as before.
-   - Use `jsonable_encoder` to convert Pydantic models to dicts for ORM instantiation.
+   - Use `insert(Model).values(...).returning(Model)` so the row and its server defaults come back
+     in one round trip, with no `db.refresh(obj)` afterwards.
+   - Use `jsonable_encoder` to convert Pydantic models to dicts for insertion.
 
 4. Updating Objects:
    - Use Pydantic v2's `.model_dump(exclude_unset=True)` or v1's `.dict(exclude_unset=True)` to get update data.
-   - Set attributes directly on the ORM object, then commit and refresh.
+   - Issue `update(Model)...returning(Model)` with `populate_existing`, which refreshes the ORM object in place.
 
 5. Deleting Objects:
    - Use `db.get(Model, id)` to fetch by primary key, then `db.delete(obj)` and `db.commit()`.
@@ -32,6 +33,14 @@ Key Changes and Best Practices for SQLAlchemy 2.0:
 7. No `.query()` or legacy Query API:
    - All `.query()` usage is replaced by `select()` and `db.execute()`.
 
+8. Async:
+   - `AsyncCRUDBase` mirrors `CRUDBase` method for method on an `AsyncSession`.
+   - Every call that touches the database is awaited (`await db.execute(stmt)`, `await db.commit()`).
+
+9. Transactions:
+   - Each write commits on its own unless it runs inside `transaction(db)` (see `unit_of_work`),
+     which commits once at the end of the outermost block.
+
 Reference: https://docs.sqlalchemy.org/en/20/orm/queryguide/select.html
 
 Legacy (1.x)         | SQLAlchemy 2.0 Modern
@@ -42,17 +51,31 @@ db.query(Model)      | select(Model) + db.execute
 .query().offset().limit() | select().offset().limit()
 """
 
+import json
 from dataclasses import field
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, AsyncIterator, Callable, Dict, Generic, Iterable, Iterator, List, Literal, Optional, Sequence, Set, Tuple, Type, TypeVar, Union
 from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy import GenerativeSelect
-from sqlalchemy.orm import Mapper, Session, foreign
-from sqlalchemy import Column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, Session, aliased, foreign, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy import Column, Row, case, column, func, insert, literal, literal_column, or_, table, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.future import select
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.db.sql.base import Base
+from app.db.sql.replicas import REPLICA_SESSION_INFO
+from app.crud.sql.entity_cache import EntityCache, coerce_values
+from app.crud.sql.pagination import decode_cursor, encode_cursor
+from app.crud.sql.query_spec import QueryFields, QuerySpec
+from app.crud.sql.unit_of_work import defer_invalidation, in_transaction
 from sqlalchemy.inspection import inspect
 
 
@@ -60,10 +83,73 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+UpsertStatus = Literal["inserted", "updated", "conflict"]
+CountMode = Literal["exact", "estimated", "cached"]
+
+_UNIQUE_VIOLATION = "23505"
+
+# Rows `search` ranks at most. Bounds the work of very common substrings, whose matches
+# would otherwise all be scored before the top `limit` are picked
+SEARCH_CANDIDATES = 1000
+
+_PG_CLASS = table("pg_class", column("oid"), column("reltuples"))
+_PG_EXTENSION = table("pg_extension", column("extname"))
+
+# Whether each database has pg_trgm, re-checked now and then so installing it needs no restart
+_pg_trgm_installed = LRUCache(maxsize=32, ttl=300)
+
+
+def _has_pg_trgm(db: Session) -> bool:
+    key = db.get_bind().engine.url.render_as_string(hide_password=True)
+    installed = _pg_trgm_installed.get(key)
+    if installed is None:
+        installed = db.execute(select(literal(True)).where(_PG_EXTENSION.c.extname == "pg_trgm")).first() is not None
+        _pg_trgm_installed.set(key, installed)
+    return installed
+
+
+class _ExplainJSON(Executable, ClauseElement):
+    """
+    `EXPLAIN (FORMAT JSON)` of a statement, compiled by the session's dialect so its
+    parameters bind the way that driver expects (named for psycopg2, positional for asyncpg).
+    """
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Any):
+        self.stmt = stmt
+
+
+@compiles(_ExplainJSON)
+def _compile_explain_json(element: _ExplainJSON, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+class UniqueViolationError(ValueError):
+    """
+    A write collided with a unique constraint that was not handled with ON CONFLICT.
+    """
+
+
+
+def _keyset_columns(model: Type[ModelType]) -> Tuple[Any, ...]:
+    """
+    Stable sort key used for pagination: `created_at` (indexed together with `id`) plus `id` as tiebreaker.
+    """
+    if getattr(model, "created_at", None) is not None:
+        return (model.created_at, model.id)
+    return (model.id,)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(
+        self,
+        model: Type[ModelType],
+        cache: Optional[EntityCache] = None,
+        cache_columns: Sequence[Column] = (),
+        filter_columns: Sequence[Column] = (),
+        sort_columns: Sequence[Column] = (),
+    ):
         """
         Create - Read - Update - Delete
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -72,27 +158,251 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         * `model`: A SQLAlchemy model class
         * `schema`: A Pydantic model (schema) class
+        * `cache`: Optional entity cache for `read` and `read_by_column`
+        * `cache_columns`: Unique columns whose `read_by_column` lookups are cached, besides `id`
+        * `filter_columns` / `sort_columns`: Indexed columns list endpoints may filter and sort on,
+          see `query_spec`
         """
         self.model = model
+        self.keyset_columns = _keyset_columns(model)
+        # Column attributes labelled by attribute name, for reads that return plain dicts
+        self.row_columns = tuple(
+            getattr(model, attr.key).label(attr.key) for attr in inspect(model).column_attrs
+        )
+        self.cache = cache
+        self.cache_columns = (model.id, *cache_columns)
+        self._columns_by_key = {attr.key: attr.columns[0] for attr in inspect(model).column_attrs}
+        self.query_fields = QueryFields(model, self.keyset_columns, filter_columns, sort_columns)
+        self._count_cache = LRUCache(
+            maxsize=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL_SECONDS, name=f"{model.__tablename__}_count"
+        )
+
+    def parse_query(self, filters: Sequence[str] = (), sort: Optional[str] = None) -> QuerySpec:
+        """
+        Parse `filter` and `sort` query parameters for `read_page`.
+
+        Raises:
+            InvalidQuerySpecError: If a filter or the sort is malformed or uses a column
+                outside `filter_columns` / `sort_columns`.
+        """
+        return self.query_fields.parse(filters, sort)
+
+    def _cache_key(self, column: Any, value: Any) -> str:
+        return f"{self.model.__tablename__}:{column.key}:{value}"
+
+    def _cache_keys(self, objs: Iterable[Any]) -> Set[str]:
+        """
+        Cache keys of `objs` (ORM objects, rows or dicts) for every cached column.
+        """
+        if self.cache is None:
+            return set()
+        keys = set()
+        for obj in objs:
+            for column in self.cache_columns:
+                value = obj.get(column.key) if isinstance(obj, dict) else getattr(obj, column.key, None)
+                if value is not None:
+                    keys.add(self._cache_key(column, value))
+        return keys
+
+    def _commit(self, db: Session, keys: Set[str]) -> None:
+        """
+        Commit a write and invalidate the cache `keys` it touched, or, inside
+        `transaction(db)`, leave both to the end of the outermost block.
+        """
+        if self.cache is not None:
+            # Peers are notified in the same transaction, so only once it commits
+            self.cache.publish(db, keys)
+        if in_transaction(db):
+            db.flush()
+            if self.cache is not None and keys:
+                defer_invalidation(db, self.cache, keys)
+            return
+        db.commit()
+        if self.cache is not None:
+            # After commit, so no reader in this worker can cache the old row again
+            self.cache.invalidate(keys)
+
+    def _read_cached(
+        self, db: Session, column: Any, value: Any, load: Callable[[], Optional[ModelType]]
+    ) -> Optional[ModelType]:
+        """
+        Serve a lookup from the entity cache, falling back to `load` and caching its result
+        (including "not found"). Results read on a replica are not cached, as they may lag
+        behind the primary.
+        """
+        assert self.cache is not None
+        key = self._cache_key(column, value)
+        hit, values = self.cache.get(self.model.__tablename__, key)
+        if hit:
+            if values is None:
+                return None
+            # Attach as a clean persistent object without a SELECT
+            db_obj = self.model(**coerce_values(self._columns_by_key, values))
+            make_transient_to_detached(db_obj)
+            return db.merge(db_obj, load=False)
+
+        db_obj = load()
+        if db.info.get(REPLICA_SESSION_INFO):
+            return db_obj
+        if db_obj is None:
+            self.cache.set(key, None)
+        else:
+            self.cache.set(key, {k: getattr(db_obj, k) for k in self._columns_by_key})
+        return db_obj
 
     def create(
-        self, db: Session, *, obj_in: CreateSchemaType, foreign_key: Optional[dict] = None
-    ) -> ModelType:
+        self,
+        db: Session,
+        *,
+        obj_in: CreateSchemaType,
+        foreign_key: Optional[dict] = None,
+        on_conflict_do_nothing: Optional[Sequence[Column]] = None,
+    ) -> Optional[ModelType]:
         """
         Create a new record in the database, optionally merging extra fields like foreign keys.
+
+        The row is written with a single `INSERT ... RETURNING`, which also loads server
+        defaults (`created_at`, ...) so no refresh is needed.
+
+        Args:
+            db (Session): The SQLAlchemy database session.
+            obj_in (CreateSchemaType): The record to insert.
+            foreign_key (dict, optional): Extra column values merged into `obj_in`.
+            on_conflict_do_nothing (Sequence[Column], optional): Unique columns on which a
+                conflicting row is left alone; None is returned instead of raising.
+
+        Returns:
+            Optional[ModelType]: The new record, or None if it conflicted on `on_conflict_do_nothing`.
+
+        Raises:
+            UniqueViolationError: If the row violates any other unique constraint.
         """
         obj_in_data = jsonable_encoder(obj_in)
 
         if foreign_key:
             obj_in_data.update(foreign_key)
 
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        return self._insert(db, obj_in_data, on_conflict_do_nothing=on_conflict_do_nothing)
+
+    def _insert(
+        self, db: Session, values: Dict[str, Any], on_conflict_do_nothing: Optional[Sequence[Column]] = None
+    ) -> Optional[ModelType]:
+        stmt = pg_insert(self.model).values(**values)
+        if on_conflict_do_nothing:
+            stmt = stmt.on_conflict_do_nothing(index_elements=on_conflict_do_nothing)
+        try:
+            db_obj = db.execute(stmt.returning(self.model)).scalar_one_or_none()
+        except IntegrityError as e:
+            if not in_transaction(db):
+                db.rollback()
+            if getattr(e.orig, "pgcode", None) == _UNIQUE_VIOLATION:
+                raise UniqueViolationError(f"{self.model.__name__} already exists") from e
+            raise
+        if db_obj is None:
+            return None
+
+        keys = self._cache_keys([db_obj])
+        self._commit(db, keys)
         return db_obj
 
 
+    def create_many(
+        self, db: Session, *, objs_in: Sequence[CreateSchemaType], chunk_size: int = 1000
+    ) -> List[Row]:
+        """
+        Insert many records with chunked multi-row `INSERT ... RETURNING` statements and a single commit.
+
+        Args:
+            db (Session): The SQLAlchemy database session.
+            objs_in (Sequence[CreateSchemaType]): The records to insert.
+            chunk_size (int, optional): Rows per INSERT statement. Defaults to 1000.
+
+        Returns:
+            List[Row]: The inserted rows (all table columns), in input order.
+        """
+        table = self.model.__table__
+        # executemany with RETURNING is batched by SQLAlchemy into multi-row INSERTs ("insertmanyvalues")
+        stmt = (
+            insert(table)
+            .returning(*table.c, sort_by_parameter_order=True)
+            .execution_options(insertmanyvalues_page_size=chunk_size)
+        )
+        rows = list(db.execute(stmt, [obj_in.model_dump() for obj_in in objs_in]).all())
+        keys = self._cache_keys(rows)
+        self._commit(db, keys)
+        return rows
+
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        index_elements: Sequence[Column],
+        update_existing: bool = True,
+        chunk_size: int = 1000,
+    ) -> List[Tuple[UpsertStatus, Optional[Row]]]:
+        """
+        Insert or update many records with chunked multi-row `INSERT ... ON CONFLICT ... RETURNING`
+        statements and a single commit.
+
+        Rows whose `index_elements` match an existing record are updated when `update_existing`
+        is True, otherwise they are left untouched and reported as conflicts. When the same key
+        appears more than once in `objs_in`, the first occurrence is written and the rest are
+        reported as conflicts (Postgres cannot touch one row twice in a single statement).
+
+        Args:
+            db (Session): The SQLAlchemy database session.
+            objs_in (Sequence[CreateSchemaType]): The records to write.
+            index_elements (Sequence[Column]): Columns of the unique index that decides a conflict.
+            update_existing (bool, optional): Update conflicting rows instead of skipping them. Defaults to True.
+            chunk_size (int, optional): Rows per INSERT statement. Defaults to 1000.
+
+        Returns:
+            List[Tuple[UpsertStatus, Optional[Row]]]: One `(status, row)` pair per input record, in input order.
+            `row` is None for conflicts.
+        """
+        table = self.model.__table__
+        keys = [column.key for column in index_elements]
+        results: List[Tuple[UpsertStatus, Optional[Row]]] = [("conflict", None)] * len(objs_in)
+
+        pending: Dict[tuple, int] = {}
+        values: List[Dict[str, Any]] = []
+        for i, obj_in in enumerate(objs_in):
+            data = obj_in.model_dump()
+            key = tuple(data[k] for k in keys)
+            if key not in pending:
+                pending[key] = i
+                values.append(data)
+
+        if values:
+            stmt = pg_insert(table)
+            if update_existing:
+                set_ = {name: stmt.excluded[name] for name in values[0] if name not in keys and name != "id"}
+                if "updated_at" in table.c:
+                    set_["updated_at"] = func.timezone("UTC", func.now())
+                stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+            # xmax is 0 only for tuples created by this statement, which tells inserts from updates
+            stmt = stmt.returning(*table.c, literal_column("xmax = 0").label("inserted"))
+            # executemany with RETURNING is batched by SQLAlchemy into multi-row INSERTs ("insertmanyvalues")
+            stmt = stmt.execution_options(insertmanyvalues_page_size=chunk_size)
+
+            for row in db.execute(stmt, values):
+                i = pending[tuple(getattr(row, k) for k in keys)]
+                results[i] = ("inserted" if row._mapping["inserted"] else "updated", row)
+
+        keys = self._cache_keys(row for _, row in results if row is not None)
+        self._commit(db, keys)
+        # The statement bypassed the ORM, so objects already loaded in this session are stale
+        for status_, row in results:
+            if status_ == "updated":
+                db_obj = db.identity_map.get(identity_key(self.model, row.id))
+                if db_obj is not None:
+                    db.expire(db_obj)
+        return results
+
+
     def read(self, db: Session, id: Union[UUID, int]) -> Optional[ModelType]:
         """
         Retrieve a single record by its unique identifier.
@@ -105,6 +415,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             Optional[ModelType]: The record if found, otherwise None.
         """
         stmt = select(self.model).where(self.model.id == id)
+        if self.cache is not None:
+            return self._read_cached(db, self.model.id, id, lambda: db.execute(stmt).scalar())
         return db.execute(stmt).scalar()
 
 
@@ -117,6 +429,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             raise ValueError(f"Column '{column.name}' does not belong to model '{self.model.__name__}'")
         
         stmt = select(self.model).where(column == value).limit(1)
+        if self.cache is not None and any(column is c for c in self.cache_columns):
+            return self._read_cached(db, column, value, lambda: db.execute(stmt).scalar_one_or_none())
         return db.execute(stmt).scalar_one_or_none()
 
 
@@ -156,9 +470,216 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             List[ModelType]: A list of records.
         """
-        stmt = select(self.model).offset(offset).limit(limit)
+        stmt = select(self.model).order_by(*self.keyset_columns).offset(offset).limit(limit)
         return list(db.execute(stmt).scalars().all())
 
+    def read_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 100,
+        as_dicts: bool = False,
+        query: Optional[QuerySpec] = None,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Retrieve one page of records in a stable `(created_at, id)` order, or the order of `query`.
+
+        With a `cursor` the page starts right after the row it points at (keyset pagination),
+        so the cost does not grow with the page depth. Without one, `offset` is applied as before,
+        which lets existing clients switch over by following the returned cursor.
+
+        Args:
+            db (Session): The SQLAlchemy database session.
+            cursor (str, optional): Opaque cursor returned with the previous page.
+            offset (int, optional): Rows to skip when no cursor is given. Defaults to 0.
+            limit (int, optional): The maximum number of records to return. Defaults to 100.
+            as_dicts (bool, optional): Return plain dicts of the model's column attributes instead
+                of ORM objects, skipping the identity map. For read-only responses.
+            query (QuerySpec, optional): Filters and sort order from `parse_query`. A cursor
+                is only valid with the query it was returned for.
+
+        Returns:
+            Tuple[List[Any], Optional[str]]: The records and the cursor of the next page,
+            or None when this is the last page.
+
+        Raises:
+            InvalidCursorError: If the cursor cannot be decoded.
+        """
+        query = query or QuerySpec(order_by=self.keyset_columns)
+        order_by = query.order_by
+        entities = self.row_columns if as_dicts else (self.model,)
+        stmt = (
+            select(*entities)
+            .where(*query.where)
+            .order_by(*[c.desc() if query.descending else c for c in order_by])
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            values = decode_cursor(cursor, order_by)
+            sort_key = tuple_(*order_by)
+            last = tuple_(*[literal(v, c.type) for c, v in zip(order_by, values)])
+            stmt = stmt.where(sort_key < last if query.descending else sort_key > last)
+        elif offset:
+            stmt = stmt.offset(offset)
+
+        result = db.execute(stmt)
+        if as_dicts:
+            # dict(zip()) is much cheaper than Row._asdict(), and pydantic validates dicts
+            # faster than it reads attributes off `Row`s
+            keys = list(result.keys())
+            items = [dict(zip(keys, row)) for row in result]
+        else:
+            items = list(result.scalars().all())
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, self.cursor_for(items[-1], order_by)
+
+    def count(self, db: Session, *, mode: CountMode = "exact", query: Optional[QuerySpec] = None) -> int:
+        """
+        Count the records matching `query`'s filters (all records without one).
+
+        Modes:
+        - `exact`: `SELECT count(*)`, which reads every matching row (or index entry).
+        - `estimated`: the planner's statistics, without reading the table. Unfiltered counts
+          come from `pg_class.reltuples`, filtered ones from the `EXPLAIN` row estimate. Only as
+          good as the last ANALYZE, and filter estimates can be far off.
+        - `cached`: an exact count reused for `COUNT_CACHE_TTL_SECONDS`, per worker and
+          per distinct set of filters.
+
+        Args:
+            db (Session): The SQLAlchemy database session.
+            mode (CountMode, optional): How to count. Defaults to "exact".
+            query (QuerySpec, optional): Filters from `parse_query`; its sort order is ignored.
+
+        Returns:
+            int: The number of matching records.
+        """
+        where = query.where if query is not None else ()
+        if mode == "estimated":
+            return self._estimate_count(db, where)
+
+        stmt = select(func.count()).select_from(self.model).where(*where)
+        if mode == "exact":
+            return db.execute(stmt).scalar_one()
+
+        compiled = self._compile(db, stmt)
+        key = (str(compiled), tuple(sorted(compiled.params.items())))
+        total = self._count_cache.get(key)
+        if total is None:
+            total = db.execute(stmt).scalar_one()
+            self._count_cache.set(key, total)
+        return total
+
+    def _estimate_count(self, db: Session, where: Sequence[Any]) -> int:
+        if not where:
+            table_name = db.get_bind().dialect.identifier_preparer.format_table(self.model.__table__)
+            reltuples = db.execute(
+                select(_PG_CLASS.c.reltuples).where(_PG_CLASS.c.oid == func.to_regclass(table_name))
+            ).scalar()
+            # -1 until the table is first vacuumed or analyzed; EXPLAIN still has an estimate then
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples)
+
+        plan = db.execute(_ExplainJSON(select(literal(1)).select_from(self.model).where(*where))).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def _compile(db: Session, stmt: Any) -> Any:
+        # Expanding IN parameters rendered out, so the SQL text can run (or key a cache) on its own
+        return stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True})
+
+    def search(self, db: Session, *, q: str, limit: int = 20, as_dicts: bool = False) -> List[Any]:
+        """
+        Find records whose `trigram_columns` contain `q` (case-insensitive), best matches first.
+
+        The `ILIKE '%q%'` match is served by the columns' pg_trgm GIN indexes, which need at
+        least three characters to narrow anything down. Up to `SEARCH_CANDIDATES` matching rows
+        are then ranked by their best trigram similarity to `q`. Exact and prefix matches are
+        taken first when there are more matches than that, so the cap never drops them.
+
+        Without the pg_trgm extension (migration a3c1f2d4b5e6 skips it on servers that do not
+        ship it) the match scans, and results are ranked exact, prefix, then other matches.
+
+        Args:
+            db (Session): The SQLAlchemy database session.
+            q (str): Substring to look for; `%` and `_` match literally.
+            limit (int, optional): The maximum number of records to return. Defaults to 20.
+            as_dicts (bool, optional): Return plain dicts of the column attributes, as in `read_page`.
+
+        Returns:
+            List[Any]: The matching records, most similar first.
+
+        Raises:
+            ValueError: If the model declares no `trigram_columns`.
+        """
+        if not self.model.trigram_columns:
+            raise ValueError(f"Model '{self.model.__name__}' has no trigram_columns to search")
+        columns = [getattr(self.model, name) for name in self.model.trigram_columns]
+        match_rank = case(
+            (or_(*[func.lower(column) == q.lower() for column in columns]), 0),
+            (or_(*[column.istartswith(q, autoescape=True) for column in columns]), 1),
+            else_=2,
+        )
+        matches = or_(*[column.icontains(q, autoescape=True) for column in columns])
+        if not _has_pg_trgm(db):
+            entities = [getattr(self.model, key).label(key) for key in self._columns_by_key] if as_dicts else [self.model]
+            stmt = select(*entities).where(matches).order_by(match_rank, self.model.id).limit(limit)
+            return self._search_results(db, stmt, as_dicts)
+
+        candidates = (
+            select(self.model)
+            .where(matches)
+            .order_by(match_rank, self.model.id)
+            .limit(SEARCH_CANDIDATES)
+            .subquery()
+        )
+        entity = aliased(self.model, candidates)
+        # greatest() skips NULLs, so a NULL model does not sink an otherwise good match
+        score = func.greatest(*[func.similarity(getattr(entity, name), q) for name in self.model.trigram_columns])
+        entities = [getattr(entity, key).label(key) for key in self._columns_by_key] if as_dicts else [entity]
+        stmt = select(*entities).order_by(score.desc(), entity.id).limit(limit)
+        return self._search_results(db, stmt, as_dicts)
+
+    @staticmethod
+    def _search_results(db: Session, stmt: Any, as_dicts: bool) -> List[Any]:
+        result = db.execute(stmt)
+        if as_dicts:
+            keys = list(result.keys())
+            return [dict(zip(keys, row)) for row in result]
+        return list(result.scalars().all())
+
+    def stream(self, db: Session, *, batch_size: int = 1000) -> Iterator[ModelType]:
+        """
+        Yield every record through a server-side cursor, fetching `batch_size` rows per round trip.
+
+        Memory stays bounded by `batch_size` regardless of table size. The session's transaction
+        (and its connection) stays open until the generator is exhausted or closed.
+
+        Args:
+            db (Session): The SQLAlchemy database session.
+            batch_size (int, optional): Rows fetched from the cursor at a time. Defaults to 1000.
+
+        Yields:
+            ModelType: The records, in storage order.
+        """
+        stmt = select(self.model).execution_options(yield_per=batch_size)
+        yield from db.execute(stmt).scalars()
+
+    def cursor_for(self, db_obj: Union[ModelType, Dict[str, Any]], columns: Optional[Sequence[Any]] = None) -> str:
+        """
+        Build the keyset cursor pointing at `db_obj`, an ORM object or a dict from `as_dicts` reads,
+        for the sort `columns` (the default `(created_at, id)` order if omitted).
+        """
+        columns = columns or self.keyset_columns
+        if isinstance(db_obj, dict):
+            return encode_cursor([db_obj[c.key] for c in columns])
+        return encode_cursor([getattr(db_obj, c.key) for c in columns])
+
   
 
     def update(
@@ -182,19 +703,30 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         Returns:
             ModelType: The updated ORM object.
+
+        Raises:
+            ValueError: If the row no longer exists.
+
+        The row is written with a single `UPDATE ... RETURNING` that refreshes `db_obj` in place,
+        including `onupdate` columns such as `updated_at`.
         """
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        values = {k: v for k, v in update_data.items() if k in self._columns_by_key and k != "id"}
+        if not values:
+            return db_obj
+
+        # Cache keys for the old values, before RETURNING overwrites them
+        keys = self._cache_keys([db_obj])
+        stmt = update(self.model).where(self.model.id == db_obj.id).values(**values).returning(self.model)
+        updated = db.execute(stmt, execution_options={"populate_existing": True}).scalar_one_or_none()
+        if updated is None:
+            raise ValueError(f"{self.model.__name__} with id {db_obj.id} not found")
+        keys |= self._cache_keys([updated])
+        self._commit(db, keys)
+        return updated
 
     def delete(self, db: Session, *, id: UUID) -> Optional[ModelType]:
         """
@@ -215,8 +747,119 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = db.get(self.model, id)
         if obj is None:
             raise ValueError(f"{self.model.__name__} with id {id} not found")
+        keys = self._cache_keys([obj])
         db.delete(obj)
-        db.commit()
+        self._commit(db, keys)
         return obj
 
 
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        Async Create - Read - Update - Delete
+        Mirrors `CRUDBase` for an `AsyncSession`; every method is a coroutine.
+
+        **Parameters**
+
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+
+    async def create(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType, foreign_key: Optional[dict] = None
+    ) -> ModelType:
+        """
+        Create a new record in the database, optionally merging extra fields like foreign keys.
+        """
+        obj_in_data = jsonable_encoder(obj_in)
+
+        if foreign_key:
+            obj_in_data.update(foreign_key)
+
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def read(self, db: AsyncSession, id: Union[UUID, int]) -> Optional[ModelType]:
+        """
+        Retrieve a single record by its unique identifier.
+        """
+        stmt = select(self.model).where(self.model.id == id)
+        return (await db.execute(stmt)).scalar()
+
+    async def read_by_column(self, db: AsyncSession, column: Column, value: Any) -> Optional[ModelType]:
+        """
+        Read a single record by a given model column and value.
+        """
+        if not hasattr(self.model, column.name) or getattr(self.model, column.name) is not column:
+            raise ValueError(f"Column '{column.name}' does not belong to model '{self.model.__name__}'")
+
+        stmt = select(self.model).where(column == value).limit(1)
+        return (await db.execute(stmt)).scalar_one_or_none()
+
+    async def read_multi_by_column(self, db: AsyncSession, column: Column, values: Any) -> List[ModelType]:
+        """
+        Read multiple records by a given model column and a value or list of values.
+        """
+        if not hasattr(self.model, column.name) or getattr(self.model, column.name) is not column:
+            raise ValueError(f"Column '{column.name}' does not belong to model '{self.model.__name__}'")
+
+        stmt = select(self.model).where(column.in_(values))
+        return list((await db.execute(stmt)).scalars().all())
+
+    async def read_multi(
+        self, db: AsyncSession, *, offset: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        """
+        Retrieve multiple records with optional pagination.
+        """
+        stmt = select(self.model).order_by(*_keyset_columns(self.model)).offset(offset).limit(limit)
+        return list((await db.execute(stmt)).scalars().all())
+
+    async def stream(self, db: AsyncSession, *, batch_size: int = 1000) -> AsyncIterator[ModelType]:
+        """
+        Yield every record through a server-side cursor, fetching `batch_size` rows per round trip.
+        """
+        stmt = select(self.model).execution_options(yield_per=batch_size)
+        async for obj in await db.stream_scalars(stmt):
+            yield obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> ModelType:
+        """
+        Update an existing database object with new values (Pydantic v2 model or dict).
+        """
+        obj_data = jsonable_encoder(db_obj)
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def delete(self, db: AsyncSession, *, id: UUID) -> Optional[ModelType]:
+        """
+        Delete an object from the database by its primary key (UUID).
+
+        Raises:
+            ValueError: If the object with the given ID is not found.
+        """
+        obj = await db.get(self.model, id)
+        if obj is None:
+            raise ValueError(f"{self.model.__name__} with id {id} not found")
+        await db.delete(obj)
+        await db.commit()
+        return obj
@@ -6,7 +6,8 @@ from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from app.models.sql import Device 
-from app.crud.sql.base import CRUDBase 
+from app.crud.sql.base import AsyncCRUDBase, CRUDBase 
+from app.crud.sql.entity_cache import entity_cache
 from app.schemas.sql import DeviceCreate, DeviceUpdate
 from sqlalchemy.future import select
 
@@ -15,6 +16,17 @@ from sqlalchemy.future import select
 class CRUDDevice(CRUDBase[Device, DeviceCreate, DeviceUpdate]):
     pass
 
+
+class AsyncCRUDDevice(AsyncCRUDBase[Device, DeviceCreate, DeviceUpdate]):
+    pass
+
         
 
-device = CRUDDevice(Device)
\ No newline at end of file
+device = CRUDDevice(
+    Device,
+    cache=entity_cache,
+    cache_columns=[Device.serial_number],
+    filter_columns=[Device.name, Device.model, Device.serial_number, Device.created_at],
+    sort_columns=[Device.created_at, Device.serial_number],
+)
+device_async = AsyncCRUDDevice(Device)
\ No newline at end of file
@@ -4,25 +4,74 @@ from typing import Any, Dict, Optional, Union, List
 from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.sql import User 
-from app.crud.sql.base import CRUDBase 
+from app.crud.sql.base import AsyncCRUDBase, CRUDBase 
+from app.crud.sql.unit_of_work import defer_invalidation, in_transaction
 from app.schemas.sql import UserCreate, UserUpdate
 from sqlalchemy.future import select
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, get_password_hash_async, principal_cache, verify_password
+
+
+def _invalidate_principal(db: Union[Session, AsyncSession], id: Any) -> None:
+    """
+    Drop the user's cached principal once the write is committed: right away, or at the end
+    of the outermost `transaction(db)` block, like `CRUDBase._commit` does for entity keys.
+    """
+    if in_transaction(db):
+        defer_invalidation(db, principal_cache, {str(id)})
+    else:
+        principal_cache.invalidate({str(id)})
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def create(self, db: Session, obj_in: UserCreate) -> User:
         obj_in_data = jsonable_encoder(obj_in)
         obj_in_data["hashed_password"] = get_password_hash(obj_in_data.pop("password"))
+        return self._insert(db, obj_in_data)
+
+    def update(
+        self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        db_user = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        _invalidate_principal(db, db_user.id)
+        return db_user
+
+    def delete(self, db: Session, *, id: UUID) -> Optional[User]:
+        db_user = super().delete(db, id=id)
+        _invalidate_principal(db, id)
+        return db_user
+
 
-        db_user = self.model(**obj_in_data) 
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def create(self, db: AsyncSession, obj_in: UserCreate) -> User:
+        obj_in_data = jsonable_encoder(obj_in)
+        obj_in_data["hashed_password"] = await get_password_hash_async(obj_in_data.pop("password"))
+
+        db_user = self.model(**obj_in_data)
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        db_user = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        _invalidate_principal(db, db_user.id)
+        return db_user
+
+    async def delete(self, db: AsyncSession, *, id: UUID) -> Optional[User]:
+        db_user = await super().delete(db, id=id)
+        _invalidate_principal(db, id)
         return db_user
         
-user = CRUDUser(User)
\ No newline at end of file
+user = CRUDUser(
+    User,
+    filter_columns=[User.email, User.created_at],
+    sort_columns=[User.created_at, User.email],
+)
+user_async = AsyncCRUDUser(User)
\ No newline at end of file
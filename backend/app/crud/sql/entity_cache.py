@@ -0,0 +1,204 @@
+"""
+Entity cache
+============
+
+Read-through cache for `CRUDBase.read` and `CRUDBase.read_by_column` on unique columns,
+enabled per CRUD object with `CRUDBase(model, cache=entity_cache, cache_columns=[...])`.
+
+Entries:
+--------
+Keys look like `device:serial_number:SN-1`. An entry is `[stored_at, values]`, where `values`
+holds the row's column attributes, or is None for a negative entry ("no such row"). Negative
+entries expire after `negative_ttl`, well before positive ones, since an insert from outside
+this service would otherwise stay invisible for the full TTL.
+
+Coherence:
+----------
+`CRUDBase` writes call `publish()` before committing and `invalidate()` after. With the
+in-process backend, `publish()` sends a Postgres NOTIFY in the write's own transaction, so
+peers only hear about committed changes. Each worker's `CacheInvalidationListener` then
+drops the keys. With Redis, all workers share the entries and deleting them is enough.
+A reader that loaded a row just before a concurrent commit can still cache the old version.
+That entry lives until the next write or the TTL runs out.
+"""
+
+import json
+import logging
+import os
+import select
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Union
+from uuid import UUID
+
+from sqlalchemy import create_engine, func
+from sqlalchemy import select as sa_select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core import metrics
+from app.core.cache import LRUCache, RedisCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads are limited to 8000 bytes; bigger invalidations ask peers to clear everything
+_MAX_NOTIFY_KEYS = 100
+
+
+class EntityCache:
+    def __init__(
+        self,
+        backend: Union[LRUCache, RedisCache],
+        *,
+        negative_ttl: float,
+        channel: Optional[str] = None,
+    ):
+        self.backend = backend
+        self.negative_ttl = negative_ttl
+        self.channel = channel
+
+    def get(self, entity: str, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Returns:
+            Tuple[bool, Optional[Dict[str, Any]]]: Whether the key was cached, and the column
+            values, which are None for a negative entry.
+        """
+        entry = self.backend.get(key)
+        if entry is not None:
+            stored_at, values = entry
+            age = time.time() - stored_at
+            if values is not None:
+                metrics.ENTITY_CACHE_REQUESTS.labels(entity, "hit").inc()
+                metrics.ENTITY_CACHE_HIT_AGE.labels(entity).observe(age)
+                return True, values
+            if age < self.negative_ttl:
+                metrics.ENTITY_CACHE_REQUESTS.labels(entity, "negative_hit").inc()
+                return True, None
+        metrics.ENTITY_CACHE_REQUESTS.labels(entity, "miss").inc()
+        return False, None
+
+    def set(self, key: str, values: Optional[Dict[str, Any]]) -> None:
+        self.backend.set(key, [time.time(), values])
+
+    def publish(self, db: Session, keys: Set[str]) -> None:
+        """
+        Tell the other workers to drop `keys` once the current transaction commits.
+        """
+        if not self.channel or not keys:
+            return
+        message: Dict[str, Any] = {"pid": os.getpid(), "sent_at": time.time()}
+        if len(keys) > _MAX_NOTIFY_KEYS:
+            message["clear"] = True
+        else:
+            message["keys"] = sorted(keys)
+        db.execute(sa_select(func.pg_notify(self.channel, json.dumps(message))))
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        count = 0
+        for key in keys:
+            self.backend.delete(key)
+            count += 1
+        metrics.ENTITY_CACHE_INVALIDATIONS.labels("local").inc(count)
+
+    def handle_notification(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("pid") == os.getpid():
+            return
+        metrics.ENTITY_CACHE_INVALIDATION_LAG.observe(max(time.time() - message["sent_at"], 0))
+        if message.get("clear"):
+            self.backend.clear()
+            return
+        for key in message["keys"]:
+            self.backend.delete(key)
+        metrics.ENTITY_CACHE_INVALIDATIONS.labels("remote").inc(len(message["keys"]))
+
+
+def coerce_values(columns: Dict[str, Any], values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert JSON-decoded values (from `RedisCache`) back to the columns' Python types.
+    Values that already have the right type are returned unchanged.
+    """
+    coerced = {}
+    for key, value in values.items():
+        python_type = columns[key].type.python_type
+        if isinstance(value, str) and python_type is not str:
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is UUID:
+                value = UUID(value)
+        coerced[key] = value
+    return coerced
+
+
+class CacheInvalidationListener:
+    """
+    Background thread that LISTENs on the cache channel and applies peers' invalidations
+    to the local cache. Uses one dedicated connection per worker, outside the pool; after
+    a reconnect the local cache is cleared, since notifications may have been missed.
+    """
+
+    def __init__(self, cache: EntityCache, url: str):
+        self.cache = cache
+        self._engine = create_engine(url, poolclass=NullPool)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="entity-cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        delay = 1.0
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                delay = 1.0
+            except Exception:
+                logger.warning("Entity cache listener disconnected, retrying in %.0fs", delay, exc_info=True)
+                self._stop.wait(delay)
+                delay = min(delay * 2, 30)
+
+    def _listen(self) -> None:
+        connection = self._engine.raw_connection()
+        try:
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.cache.channel}"')
+            self.cache.backend.clear()
+            while not self._stop.is_set():
+                if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    self.cache.handle_notification(dbapi_connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+
+def build_entity_cache() -> Optional[EntityCache]:
+    backend = settings.ENTITY_CACHE_BACKEND
+    if backend == "memory":
+        return EntityCache(
+            LRUCache(maxsize=settings.ENTITY_CACHE_SIZE, ttl=settings.ENTITY_CACHE_TTL_SECONDS),
+            negative_ttl=settings.ENTITY_CACHE_NEGATIVE_TTL_SECONDS,
+            channel=settings.ENTITY_CACHE_CHANNEL,
+        )
+    if backend == "redis":
+        if not settings.ENTITY_CACHE_REDIS_URL:
+            raise ValueError("ENTITY_CACHE_REDIS_URL must be set when ENTITY_CACHE_BACKEND is 'redis'")
+        return EntityCache(
+            RedisCache.from_url(settings.ENTITY_CACHE_REDIS_URL, ttl=settings.ENTITY_CACHE_TTL_SECONDS, prefix="entity:"),
+            negative_ttl=settings.ENTITY_CACHE_NEGATIVE_TTL_SECONDS,
+        )
+    return None
+
+
+entity_cache = build_entity_cache()
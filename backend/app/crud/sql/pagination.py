@@ -0,0 +1,65 @@
+"""
+Keyset (cursor) pagination helpers
+==================================
+
+A cursor is the sort key of the last row on a page, JSON encoded and wrapped in
+URL-safe base64 so clients treat it as an opaque token. The next page is read
+with a row-value comparison (`(created_at, id) > (:created_at, :id)`), which
+Postgres answers straight from the composite index no matter how deep the page is.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Sequence
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(jsonable_encoder(list(values)), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor` back into typed values for `columns`.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or does not match `columns`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [coerce_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursorError("Invalid pagination cursor")
+
+
+def coerce_value(column: Any, value: Any) -> Any:
+    """
+    Convert a JSON or query string value to `column`'s Python type.
+
+    Raises:
+        ValueError: If the value does not parse as that type.
+    """
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is bool and isinstance(value, str):
+        if value.lower() not in ("true", "false"):
+            raise ValueError(value)
+        return value.lower() == "true"
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is UUID:
+        return UUID(value)
+    return python_type(value)
@@ -0,0 +1,146 @@
+"""
+Filter and sort query specs
+===========================
+
+List endpoints accept filters and a sort order as query parameters:
+
+    ?filter=model:eq:X&filter=name:prefix:abc&sort=-created_at
+
+Each `filter` is `column:operator:value`; several filters are ANDed. `sort` names one
+column, descending with a leading `-`. `QueryFields.parse` turns them into a `QuerySpec`
+that `CRUDBase.read_page` applies together with its keyset pagination.
+
+Only whitelisted columns can be used, and each of them must lead an index of the table,
+so comparisons never turn into a sequential scan. Operators:
+
+- `eq`, `lt`, `lte`, `gt`, `gte`: comparisons.
+- `in`: comma separated values.
+- `prefix`: `LIKE 'value%'`, on string columns only. Plain btree indexes only serve it
+  under the C collation (the postgres image defaults to en_US.utf8). The device columns'
+  trigram indexes (migration a3c1f2d4b5e6, when pg_trgm is available) serve it instead;
+  without them, and on `user.email`, a prefix filter scans the rows the other filters leave.
+
+The next-page cursor encodes the sort column's value, so it is only valid with the same
+filters and sort it was returned for. Sort columns should not hold NULLs, which the
+keyset comparison would skip.
+"""
+
+import operator
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, String, Table
+from sqlalchemy.exc import ArgumentError
+
+from app.crud.sql.pagination import coerce_value
+
+OPERATORS = ("eq", "lt", "lte", "gt", "gte", "in", "prefix")
+# Upper bound on `in` lists, so one parameter cannot expand into a huge statement
+MAX_IN_VALUES = 100
+
+
+_COMPARISONS = {
+    "eq": operator.eq,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+}
+
+
+class InvalidQuerySpecError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class QuerySpec:
+    where: Tuple[Any, ...] = ()
+    # Keyset columns in sort order, e.g. (created_at, id)
+    order_by: Tuple[Any, ...] = ()
+    descending: bool = False
+
+
+def _leading_index_columns(table: Table) -> set:
+    names = {index.columns[0].name for index in table.indexes}
+    names |= {constraint.columns[0].name for constraint in table.constraints if len(constraint.columns)}
+    return names
+
+
+def _comparison(column: Any, op: str, value: str) -> Any:
+    if op == "prefix":
+        if not isinstance(column.type, String):
+            raise InvalidQuerySpecError(f"The 'prefix' operator only applies to text fields, not '{column.key}'")
+        return column.startswith(value, autoescape=True)
+    if op == "in":
+        values = value.split(",")
+        if len(values) > MAX_IN_VALUES:
+            raise InvalidQuerySpecError(f"At most {MAX_IN_VALUES} values are allowed in an 'in' filter")
+        return column.in_([coerce_value(column, v) for v in values])
+    return _COMPARISONS[op](column, coerce_value(column, value))
+
+
+class QueryFields:
+    """
+    The columns of one model that list endpoints may filter and sort on.
+
+    Raises:
+        ValueError: If a whitelisted column does not lead any index of the table.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        keyset_columns: Sequence[Any],
+        filter_columns: Sequence[Column] = (),
+        sort_columns: Sequence[Column] = (),
+    ):
+        indexed = _leading_index_columns(model.__table__)
+        for column in (*filter_columns, *sort_columns):
+            if column.name not in indexed:
+                raise ValueError(f"{model.__tablename__}.{column.name} is not indexed and cannot be filtered or sorted on")
+        self.model = model
+        self.keyset_columns = tuple(keyset_columns)
+        self.filter_columns: Dict[str, Any] = {column.key: column for column in filter_columns}
+        self.sort_columns: Dict[str, Any] = {column.key: column for column in sort_columns}
+
+    def parse(self, filters: Sequence[str] = (), sort: Optional[str] = None) -> QuerySpec:
+        """
+        Raises:
+            InvalidQuerySpecError: If a filter or the sort is malformed or not whitelisted.
+        """
+        where: List[Any] = []
+        for raw in filters:
+            name, op, value = self._split_filter(raw)
+            try:
+                where.append(_comparison(self.filter_columns[name], op, value))
+            except InvalidQuerySpecError:
+                raise
+            except (ValueError, TypeError, ArgumentError):
+                raise InvalidQuerySpecError(f"Invalid value for filter on '{name}': {value!r}")
+
+        order_by = self.keyset_columns
+        descending = False
+        if sort:
+            descending = sort.startswith("-")
+            name = sort[1:] if descending else sort
+            if name not in self.sort_columns:
+                raise InvalidQuerySpecError(
+                    f"Cannot sort on '{name}'; sortable fields: {', '.join(self.sort_columns) or 'none'}"
+                )
+            column = self.sort_columns[name]
+            # A unique column orders rows on its own; otherwise the id breaks ties
+            order_by = (column,) if column.unique else (column, self.model.id)
+        return QuerySpec(where=tuple(where), order_by=order_by, descending=descending)
+
+    def _split_filter(self, raw: str) -> Tuple[str, str, str]:
+        parts = raw.split(":", 2)
+        if len(parts) != 3:
+            raise InvalidQuerySpecError(f"Filter must look like 'field:operator:value', got {raw!r}")
+        name, op, value = parts
+        if name not in self.filter_columns:
+            raise InvalidQuerySpecError(
+                f"Cannot filter on '{name}'; filterable fields: {', '.join(self.filter_columns) or 'none'}"
+            )
+        if op not in OPERATORS:
+            raise InvalidQuerySpecError(f"Unknown filter operator '{op}'; use one of {', '.join(OPERATORS)}")
+        return name, op, value
@@ -0,0 +1,64 @@
+"""
+Unit of work
+============
+
+By default every CRUD write commits on its own. Inside `transaction(db)` the writes only
+run their statements, and the outermost block commits once at the end, so N writes cost
+one COMMIT (and one WAL flush) instead of N:
+
+    with crud.sql.transaction(db):
+        crud.sql.device.create(db=db, obj_in=a)
+        crud.sql.device.create(db=db, obj_in=b)
+
+Nested blocks become SAVEPOINTs. An exception leaving a nested block rolls back only
+that block's writes; one leaving the outermost block rolls back everything. After a
+database error inside a block, let the exception leave the block (or catch it outside
+a nested one), since Postgres refuses further statements in a failed transaction.
+
+Entity cache invalidations are collected and applied after the final commit.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+_DEPTH = "uow_depth"
+_PENDING_INVALIDATIONS = "uow_pending_invalidations"
+
+
+def in_transaction(db: Session) -> bool:
+    """
+    Whether `db` is inside a `transaction()` block, in which case CRUD methods must not commit.
+    """
+    return db.info.get(_DEPTH, 0) > 0
+
+
+def defer_invalidation(db: Session, cache: Any, keys: Set[str]) -> None:
+    db.info.setdefault(_PENDING_INVALIDATIONS, []).append((cache, keys))
+
+
+@contextmanager
+def transaction(db: Session) -> Iterator[Session]:
+    depth = db.info.get(_DEPTH, 0)
+    savepoint = db.begin_nested() if depth else None
+    db.info[_DEPTH] = depth + 1
+    try:
+        yield db
+        if savepoint is not None:
+            savepoint.commit()
+    except BaseException:
+        if savepoint is not None:
+            savepoint.rollback()
+        else:
+            db.rollback()
+            db.info.pop(_PENDING_INVALIDATIONS, None)
+        raise
+    finally:
+        db.info[_DEPTH] = depth
+
+    if savepoint is None:
+        db.commit()
+        pending: List[Tuple[Any, Set[str]]] = db.info.pop(_PENDING_INVALIDATIONS, [])
+        for cache, keys in pending:
+            cache.invalidate(keys)
@@ -0,0 +1,351 @@
+"""
+Index advisor
+=============
+
+Compares the indexes declared on the models in `app.models.sql` with the ones in the
+database and how often Postgres used them, then reports:
+
+- unused: never scanned since statistics were last reset. Unique and primary key
+  indexes are left out, since they enforce constraints whether or not they are read.
+- duplicate: covered by another index of the same kind whose columns start with the same
+  columns, so the planner can always use that one instead.
+- missing: declared on a model but absent from the database (a migration was not applied
+  or not written).
+- undeclared: present in the database but on no model.
+- seq_scans: tables read mostly through sequential scans, with the most expensive
+  statements from `pg_stat_statements` when that extension is installed.
+
+Every index costs a write on each INSERT and on each UPDATE of its columns, so unused and
+duplicate ones are pure overhead. Usage counts are per server: check the primary and every
+replica before dropping anything, and let statistics cover a full traffic cycle first.
+
+    python -m app.db.index_advisor
+    python -m app.db.index_advisor --generate-migration
+
+The generated migration drops the unused and duplicate indexes (concurrently) and recreates
+them on downgrade; remove the matching `index=True` declarations from the models as well.
+"""
+
+import argparse
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Connection, MetaData, create_engine, text
+
+from app.core.config import settings
+from app.db.sql.base import Base
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Tables smaller than this are sequentially scanned by design
+SEQ_SCAN_MIN_ROWS = 10_000
+
+INDEX_USAGE_SQL = text(
+    """
+    SELECT s.relname, s.indexrelname, s.idx_scan, pg_relation_size(s.indexrelid),
+           i.indisunique, i.indisprimary, am.amname, pg_get_indexdef(s.indexrelid),
+           ARRAY(
+               SELECT a.attname
+               FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           )
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    JOIN pg_class c ON c.oid = s.indexrelid
+    JOIN pg_am am ON am.oid = c.relam
+    WHERE s.schemaname = current_schema()
+    """
+)
+
+TABLE_SCANS_SQL = text(
+    """
+    SELECT relname, seq_scan, seq_tup_read, COALESCE(idx_scan, 0), n_live_tup
+    FROM pg_stat_user_tables
+    WHERE schemaname = current_schema()
+    """
+)
+
+TOP_STATEMENTS_SQL = text(
+    """
+    SELECT query, calls, total_exec_time, mean_exec_time
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    ORDER BY total_exec_time DESC
+    LIMIT :limit
+    """
+)
+
+
+@dataclass
+class IndexInfo:
+    table: str
+    name: str
+    columns: Tuple[str, ...]
+    method: str = "btree"
+    unique: bool = False
+    primary: bool = False
+    # Database side only
+    scans: Optional[int] = None
+    size_bytes: Optional[int] = None
+    definition: Optional[str] = None
+
+
+@dataclass
+class TableScans:
+    table: str
+    seq_scans: int
+    seq_rows_read: int
+    index_scans: int
+    live_rows: int
+
+
+@dataclass
+class Finding:
+    kind: str
+    table: str
+    index: Optional[str]
+    detail: str
+    statements: List[str] = field(default_factory=list)
+
+    @property
+    def droppable(self) -> bool:
+        return self.kind in ("unused", "duplicate")
+
+
+def declared_indexes(metadata: MetaData) -> Dict[Tuple[str, str], IndexInfo]:
+    indexes = {}
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            indexes[(table.name, index.name)] = IndexInfo(
+                table=table.name,
+                name=index.name,
+                columns=tuple(column.name for column in index.columns),
+                method=index.dialect_options["postgresql"].get("using") or "btree",
+                unique=bool(index.unique),
+            )
+    return indexes
+
+
+def database_indexes(connection: Connection) -> Dict[Tuple[str, str], IndexInfo]:
+    indexes = {}
+    for table, name, scans, size, unique, primary, method, definition, columns in connection.execute(INDEX_USAGE_SQL):
+        indexes[(table, name)] = IndexInfo(
+            table=table,
+            name=name,
+            columns=tuple(columns),
+            method=method,
+            unique=unique,
+            primary=primary,
+            scans=scans,
+            size_bytes=size,
+            definition=definition,
+        )
+    return indexes
+
+
+def table_scans(connection: Connection) -> List[TableScans]:
+    return [TableScans(*row) for row in connection.execute(TABLE_SCANS_SQL)]
+
+
+def top_statements(connection: Connection, limit: int = 50) -> Optional[List[Tuple[str, int, float, float]]]:
+    """
+    The most expensive statements by total time, or None if `pg_stat_statements` is unavailable.
+    """
+    installed = connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")).scalar()
+    if not installed:
+        return None
+    # The view errors out unless the library is also in shared_preload_libraries
+    savepoint = connection.begin_nested()
+    try:
+        rows = [tuple(row) for row in connection.execute(TOP_STATEMENTS_SQL, {"limit": limit})]
+    except Exception:
+        savepoint.rollback()
+        return None
+    savepoint.commit()
+    return rows
+
+
+def analyze(
+    declared: Dict[Tuple[str, str], IndexInfo],
+    actual: Dict[Tuple[str, str], IndexInfo],
+    tables: Sequence[TableScans] = (),
+    statements: Optional[Sequence[Tuple[str, int, float, float]]] = None,
+    max_unused_scans: int = 0,
+) -> List[Finding]:
+    findings = []
+    for key, index in sorted(actual.items()):
+        if index.unique or index.primary:
+            continue
+        if index.scans is not None and index.scans <= max_unused_scans:
+            findings.append(
+                Finding("unused", index.table, index.name, f"{index.scans} scans, {_size(index.size_bytes)}")
+            )
+        cover = _covering_index(index, actual.values())
+        if cover is not None:
+            findings.append(
+                Finding("duplicate", index.table, index.name, f"covered by {cover.name} ({', '.join(cover.columns)})")
+            )
+
+    for key, index in sorted(declared.items()):
+        if key not in actual:
+            findings.append(Finding("missing", index.table, index.name, f"declared on ({', '.join(index.columns)})"))
+    for key, index in sorted(actual.items()):
+        if key not in declared and not index.primary:
+            findings.append(Finding("undeclared", index.table, index.name, index.definition or ""))
+
+    for scans in tables:
+        if scans.live_rows >= SEQ_SCAN_MIN_ROWS and scans.seq_scans > scans.index_scans:
+            finding = Finding(
+                "seq_scans",
+                scans.table,
+                None,
+                f"{scans.seq_scans} sequential scans read {scans.seq_rows_read} rows, vs {scans.index_scans} index scans",
+            )
+            finding.statements = [
+                f"{mean:.1f} ms x {calls}: {' '.join(query.split())}"
+                for query, calls, _, mean in statements or ()
+                if scans.table in query
+            ][:5]
+            findings.append(finding)
+    return findings
+
+
+def _covering_index(index: IndexInfo, indexes: Sequence[IndexInfo]) -> Optional[IndexInfo]:
+    for other in indexes:
+        if (
+            other.name != index.name
+            and other.table == index.table
+            and other.method == index.method
+            and other.columns[: len(index.columns)] == index.columns
+            # Of two identical indexes, report only one
+            and (len(other.columns) > len(index.columns) or other.unique or other.name < index.name)
+        ):
+            return other
+    return None
+
+
+def _size(size_bytes: Optional[int]) -> str:
+    if size_bytes is None:
+        return "size unknown"
+    return f"{size_bytes / 1024:.0f} kB"
+
+
+def report(findings: Sequence[Finding], statements_available: bool) -> str:
+    lines = []
+    for kind in ("unused", "duplicate", "missing", "undeclared", "seq_scans"):
+        matching = [finding for finding in findings if finding.kind == kind]
+        if not matching:
+            continue
+        lines.append(f"{kind}:")
+        for finding in matching:
+            name = f"{finding.table}.{finding.index}" if finding.index else finding.table
+            lines.append(f"  {name}: {finding.detail}")
+            lines.extend(f"    {statement}" for statement in finding.statements)
+    if not lines:
+        lines.append("No findings.")
+    if not statements_available:
+        lines.append("(pg_stat_statements is not available; statement hints skipped)")
+    return "\n".join(lines)
+
+
+def render_migration(drops: Sequence[IndexInfo], revision: str, down_revision: Optional[str]) -> str:
+    upgrade = "\n".join(
+        f"        op.drop_index('{index.name}', table_name='{index.table}', postgresql_concurrently=True)"
+        for index in drops
+    )
+    # pg_get_indexdef() gives the exact definition back, including method and operator classes
+    downgrade = "\n".join(
+        f"        op.execute({index.definition.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)!r})"
+        for index in reversed(drops)
+    )
+    names = ", ".join(index.name for index in drops)
+    return f'''"""drop unused indexes
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {datetime.now()}
+
+Generated by app.db.index_advisor: {names}.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '{revision}'
+down_revision: Union[str, Sequence[str], None] = {down_revision!r}
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+{upgrade}
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+{downgrade}
+'''
+
+
+def write_migration(drops: Sequence[IndexInfo]) -> Path:
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    revision = uuid.uuid4().hex[:12]
+    path = Path(script.versions) / f"{revision}_drop_unused_indexes.py"
+    path.write_text(render_migration(drops, revision, script.get_current_head()))
+    return path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.db.index_advisor", description=__doc__.split("\n\n")[1])
+    parser.add_argument("--url", default=str(settings.SQLALCHEMY_DATABASE_URI), help="Database to inspect")
+    parser.add_argument(
+        "--max-unused-scans", type=int, default=0, help="Report indexes with at most this many scans as unused"
+    )
+    parser.add_argument(
+        "--generate-migration", action="store_true", help="Write an Alembic migration dropping unused and duplicate indexes"
+    )
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.url)
+    with engine.connect() as connection:
+        actual = database_indexes(connection)
+        statements = top_statements(connection)
+        findings = analyze(
+            declared_indexes(Base.metadata),
+            actual,
+            table_scans(connection),
+            statements,
+            max_unused_scans=args.max_unused_scans,
+        )
+        stats_reset = connection.execute(
+            text("SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()")
+        ).scalar()
+    engine.dispose()
+
+    print(f"Usage statistics since: {stats_reset or 'server start'}")
+    print(report(findings, statements is not None))
+
+    if args.generate_migration:
+        names = {(finding.table, finding.index) for finding in findings if finding.droppable}
+        drops = [actual[key] for key in sorted(names)]
+        if not drops:
+            print("Nothing to drop; no migration written.")
+            return
+        print(f"Wrote {write_migration(drops)}")
+
+
+if __name__ == "__main__":
+    main()
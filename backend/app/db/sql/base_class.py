@@ -1,7 +1,7 @@
 #app/db/sql/base_class.py
 
 from datetime import datetime, timezone
-from typing import Any, ClassVar, Optional
+from typing import Any, ClassVar, Optional, Tuple
 from sqlalchemy import UUID, Column, DateTime, Index, MetaData, text
 from sqlalchemy.orm import as_declarative, declared_attr
 import sqlalchemy.orm
@@ -16,6 +16,8 @@ class Base:
     metadata: MetaData
     __abstract__ = True 
     include_create_update_index: ClassVar[bool] = True
+    # Columns that get a pg_trgm GIN index for substring search (`CRUDBase.search`)
+    trigram_columns: ClassVar[Tuple[str, ...]] = ()
     id: Any
 
     @declared_attr  # type: ignore
@@ -41,6 +43,23 @@ class Base:
     def __tablename__(cls) -> str:  
         return camel_to_snake(cls.__name__)  # type: ignore[attr-defined]
 
+    @declared_attr  # type: ignore
+    def __table_args__(cls):
+        indexes = []
+        # (created_at, id) backs the stable sort used by keyset pagination
+        if cls.include_create_update_index and getattr(cls, "include_timestamps", True):
+            indexes.append(Index(f"ix_{cls.__tablename__}_created_at_id", "created_at", "id"))
+        for column in cls.trigram_columns:
+            indexes.append(
+                Index(
+                    f"ix_{cls.__tablename__}_{column}_trgm",
+                    column,
+                    postgresql_using="gin",
+                    postgresql_ops={column: "gin_trgm_ops"},
+                )
+            )
+        return tuple(indexes)
+
     def __repr__(self) -> str:
         cls = self.__class__
         fields = [
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def pool_sizing(budget: int, workers: int, overflow_ratio: float) -> Tuple[int, int]:
+    """
+    Split a total connection budget across worker processes.
+
+    Each worker gets `budget // workers` connections, of which `overflow_ratio` are
+    overflow (opened under load, closed again when returned) and the rest persistent.
+
+    Returns:
+        Tuple[int, int]: `pool_size` and `max_overflow` for one worker's engine.
+    """
+    per_worker = max(budget // max(workers, 1), 1)
+    max_overflow = min(int(per_worker * overflow_ratio), per_worker - 1)
+    return per_worker - max_overflow, max_overflow
+
+
+class _CheckoutTimer:
+    """
+    Records how long checkouts wait for a connection, including the time spent
+    opening a new one when the pool grows, and publishes pool occupancy to `metrics`.
+    """
+
+    metrics_label = "sync"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            metrics.DB_POOL_CHECKOUT_WAIT.observe(waited)
+            self._observe()
+
+    def _do_return_conn(self, record):
+        try:
+            super()._do_return_conn(record)  # type: ignore[misc]
+        finally:
+            self._observe()
+
+    def _observe(self) -> None:
+        metrics.observe_pool(self.metrics_label, self.checkedout(), self.overflow())  # type: ignore[attr-defined]
+
+
+class TimedQueuePool(_CheckoutTimer, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    stats: Dict[str, Any] = {
+        "pool_size": pool.size(),  # type: ignore[attr-defined]
+        "max_overflow": pool._max_overflow,  # type: ignore[attr-defined]
+        "checked_out": pool.checkedout(),  # type: ignore[attr-defined]
+        "checked_in": pool.checkedin(),  # type: ignore[attr-defined]
+        "overflow": pool.overflow(),  # type: ignore[attr-defined]
+        "timeout": pool.timeout(),  # type: ignore[attr-defined]
+    }
+    if isinstance(pool, _CheckoutTimer):
+        stats.update(
+            wait_count=pool.wait_count,
+            wait_seconds_total=pool.wait_seconds_total,
+            wait_seconds_max=pool.wait_seconds_max,
+        )
+    return stats
+
+
+def warm_up_pool(engine: Engine, connections: int) -> int:
+    """
+    Open up to `connections` connections and return them to the pool, so the first
+    requests after startup do not pay for connection setup. Capped at the pool size,
+    since overflow connections are closed as soon as they are returned.
+
+    Returns:
+        int: The number of connections opened.
+    """
+    count = min(connections, engine.pool.size())  # type: ignore[attr-defined]
+    opened = []
+    try:
+        for _ in range(count):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+    logger.info("Warmed up %s database connections", len(opened))
+    return len(opened)
+
+
+async def warm_up_async_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Async counterpart of `warm_up_pool`.
+    """
+    count = min(connections, engine.pool.size())  # type: ignore[attr-defined]
+    opened = []
+    try:
+        for _ in range(count):
+            opened.append(await engine.connect())
+    finally:
+        for connection in opened:
+            await connection.close()
+    logger.info("Warmed up %s database connections", len(opened))
+    return len(opened)
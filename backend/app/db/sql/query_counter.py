@@ -0,0 +1,66 @@
+"""
+SQL statement counting
+======================
+
+`QueryCounter` records every statement an engine (or connection) sends to the database
+while it is active. The test suite uses it to put query budgets on endpoints, and
+`app.core.query_audit` uses the same statement shapes to spot N+1 patterns at runtime.
+
+A statement's shape is its SQL with bound parameters and expanded IN lists collapsed,
+so the same query issued for different rows counts as a repeat.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+
+_PARAMETER = re.compile(r"%\(\w+\)s|\$\d+|\?")
+_PARAMETER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    shape = _PARAMETER.sub("?", statement)
+    shape = _PARAMETER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def repeated_shapes(statements: List[str], threshold: int) -> Dict[str, int]:
+    """
+    Shapes issued at least `threshold` times, with their counts.
+    """
+    counts = Counter(statement_shape(statement) for statement in statements)
+    return {shape: count for shape, count in counts.items() if count >= threshold}
+
+
+class QueryCounter:
+    """
+    Context manager collecting the statements executed on `target` (an Engine or Connection).
+
+        with QueryCounter(engine) as queries:
+            ...
+        assert queries.count <= 2
+    """
+
+    def __init__(self, target: Any):
+        self.target = target
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = 2) -> Dict[str, int]:
+        return repeated_shapes(self.statements, threshold)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.target, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        event.remove(self.target, "before_cursor_execute", self._record)
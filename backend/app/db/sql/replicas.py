@@ -0,0 +1,122 @@
+"""
+Read replica routing
+====================
+
+Read-only sessions (`get_read_db`) are bound to a streaming replica when one is configured
+(`DB_REPLICA_URLS`) and healthy; writes always go to the primary. Each replica has its own
+pool per worker, sized from DB_REPLICA_CONNECTION_BUDGET. Sessions bound to a replica carry
+`REPLICA_SESSION_INFO` in `Session.info`, so the entity cache is never filled from them.
+
+Lag:
+----
+A background thread (`start()`, run from the app's lifespan) measures each replica's replay
+lag every `check_interval` seconds; requests only read the last measurement. A replica
+lagging more than `max_lag` seconds, failing the check, or not measured yet gets no reads
+until a later check passes; with no usable replica, reads fall back to the primary.
+
+Read-your-writes:
+-----------------
+After a request commits a write, its user's reads go to the primary for `sticky_seconds`,
+so they never read a replica that has not replayed their own change yet. The marker is
+kept per worker; HTTP keep-alive keeps a client on the same worker in the common case.
+"""
+
+import itertools
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Engine, text
+
+from app.core import metrics
+from app.core.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# `Session.info` key set on sessions bound to a replica
+REPLICA_SESSION_INFO = "replica"
+
+# Zero on a primary and on a replica that has replayed everything it received, otherwise
+# the age of the last replayed transaction
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+def measure_lag(engine: Engine) -> float:
+    with engine.connect() as connection:
+        return float(connection.execute(REPLICA_LAG_SQL).scalar_one())
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        replicas: List[Engine],
+        *,
+        max_lag: float,
+        check_interval: float,
+        sticky_seconds: float,
+        lag_probe: Callable[[Engine], float] = measure_lag,
+    ):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self.lag: Dict[int, float] = {i: float("inf") for i in range(len(replicas))}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._round_robin = itertools.count()
+        self._recent_writers = LRUCache(maxsize=100_000, ttl=sticky_seconds)
+
+    def mark_write(self, subject: Optional[str]) -> None:
+        if subject:
+            self._recent_writers.set(subject, True)
+
+    def choose(self, subject: Optional[str] = None) -> Optional[Engine]:
+        """
+        Engine for a read on behalf of `subject` (the token subject), or None for the primary.
+        """
+        if not self.replicas:
+            return None
+        if subject and self._recent_writers.get(subject):
+            metrics.DB_READ_ROUTES.labels("primary", "recent_write").inc()
+            return None
+        healthy = [i for i, lag in self.lag.items() if lag <= self.max_lag]
+        if not healthy:
+            metrics.DB_READ_ROUTES.labels("primary", "replica_lag").inc()
+            return None
+        metrics.DB_READ_ROUTES.labels("replica", "ok").inc()
+        return self.replicas[healthy[next(self._round_robin) % len(healthy)]]
+
+    def refresh_lag(self) -> None:
+        for i, replica in enumerate(self.replicas):
+            try:
+                self.lag[i] = self.lag_probe(replica)
+            except Exception:
+                logger.warning("Replica lag check failed for %s", replica.url.host, exc_info=True)
+                self.lag[i] = float("inf")
+            metrics.DB_REPLICA_LAG.labels(str(i)).set(self.lag[i])
+
+    def start(self) -> None:
+        if not self.replicas:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-lag-probe", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh_lag()
+            self._stop.wait(self.check_interval)
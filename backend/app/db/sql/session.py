@@ -1,8 +1,105 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.db.sql.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool, pool_sizing
+from app.db.sql.replicas import REPLICA_SESSION_INFO, ReplicaSet
+
+
+def engine_options(budget: int | None = None, **overrides: Any) -> dict:
+    """
+    Pool options shared by every engine, sized so that WEB_CONCURRENCY workers
+    together stay within `budget` (default DB_CONNECTION_BUDGET) connections.
+    """
+    pool_size, max_overflow = pool_sizing(
+        budget or settings.DB_CONNECTION_BUDGET, settings.WEB_CONCURRENCY, settings.DB_POOL_OVERFLOW_RATIO
+    )
+    options = dict(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    options.update(overrides)
+    return options
+
+
+def create_db_engine(url: str | None = None, budget: int | None = None, **overrides: Any) -> Engine:
+    return create_engine(
+        url or str(settings.SQLALCHEMY_DATABASE_URI),
+        **engine_options(budget, poolclass=TimedQueuePool, **overrides),
+    )
+
+
+def create_async_db_engine(url: str | None = None, **overrides: Any) -> AsyncEngine:
+    return create_async_engine(
+        url or str(settings.SQLALCHEMY_ASYNC_DATABASE_URI),
+        **engine_options(poolclass=TimedAsyncAdaptedQueuePool, **overrides),
+    )
+
+
+class ReadOnlySession(Session):
+    """
+    Session for routes that only read. Its connections run `BEGIN READ ONLY DEFERRABLE`
+    transactions (psycopg2 folds the modes into BEGIN, so no extra round trip) and flushing
+    raises, so pending changes can never be written by accident. DEFERRABLE only has an effect
+    on a server running SERIALIZABLE, where the read waits for a safe snapshot and then skips
+    predicate locking and serialization failures; under the default READ COMMITTED it is a no-op.
+    """
+
+    def flush(self, objects: Any = None) -> None:
+        raise InvalidRequestError("This session is read-only")
+
+
+assert settings.SQLALCHEMY_DATABASE_URI is not None, "SQLALCHEMY_DATABASE_URI must be set"
+engine = create_db_engine()
+# Writes load their rows with RETURNING, so objects stay valid after commit instead of
+# being expired and re-selected on next access
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_commit(session: Session) -> None:
+    # Lets `get_db` tell requests that wrote apart, for read-your-writes routing
+    session.info["committed"] = True
+
+
+def read_only_sessionmaker(bind: Engine, **kwargs: Any) -> sessionmaker:
+    # Shares the engine's pool; the read-only modes are set on checkout and reset on return
+    return sessionmaker(
+        class_=ReadOnlySession, autoflush=False, expire_on_commit=False,
+        bind=bind.execution_options(postgresql_readonly=True, postgresql_deferrable=True), **kwargs,
+    )
+
+
+ReadOnlySessionLocal = read_only_sessionmaker(engine)
+
+
+
+def create_replica_engine(index: int, url: str) -> Engine:
+    replica_engine = create_db_engine(url, budget=settings.DB_REPLICA_CONNECTION_BUDGET)
+    replica_engine.pool.metrics_label = f"replica-{index}"  # type: ignore[attr-defined]
+    return replica_engine
+
 
+replica_engines = [create_replica_engine(i, url) for i, url in enumerate(filter(None, settings.DB_REPLICA_URLS))]
+replicas = ReplicaSet(
+    replica_engines,
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_LAG_CHECK_SECONDS,
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+)
+ReplicaSessionLocals = {
+    replica_engine: read_only_sessionmaker(replica_engine, info={REPLICA_SESSION_INFO: True})
+    for replica_engine in replica_engines
+}
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
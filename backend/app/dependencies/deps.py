@@ -4,20 +4,27 @@ from fastapi.security import (
     HTTPBearer,
     HTTPAuthorizationCredentials,
 )
-from fastapi import Depends, HTTPException, status, Security
+from fastapi import Depends, HTTPException, Request, status, Security
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.sql import User
 from app.core import security
-from jose import jwt
+from jose import JWTError, jwt
 
 
-from app.db.sql.session import SessionLocal
+from app.db.sql.session import (
+    AsyncSessionLocal,
+    ReadOnlySessionLocal,
+    ReplicaSessionLocals,
+    SessionLocal,
+    replicas,
+)
 from app.core.config import settings
-from app.schemas.sql import TokenPayload
+from app.schemas.sql import TokenPayload, UserPrincipal
 
-from typing import Any, Callable, Generator, Annotated, Type
+from typing import Any, AsyncGenerator, Callable, Generator, Annotated, Optional, Type
 
 from app.crud.sql.base import CRUDBase
 
@@ -27,56 +34,129 @@ reusable_oauth2_v1 = OAuth2PasswordBearer(
 )
 
 
-def get_db() -> Generator:
+def _token_subject(request: Request) -> Optional[str]:
+    """
+    Subject of the request's bearer token, or None if it has none or it does not verify.
+    Only used to route reads; authentication proper happens in `get_current_user`.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+def get_db(request: Request) -> Generator:
     try:
         db = SessionLocal()
         yield db
     finally:
         db.close()
+        if db.info.get("committed") and replicas.replicas:
+            replicas.mark_write(_token_subject(request))
+
+
+def get_read_db(request: Request) -> Generator:
+    """
+    Read-only session for GET routes, see `ReadOnlySession`. The principal lookup shares it
+    (`get_current_user`), so a GET request never holds more than one connection. Bound to a replica when
+    `replicas` picks one (see `app.db.sql.replicas`), otherwise to the primary.
+    """
+    session_factory = ReadOnlySessionLocal
+    if replicas.replicas:
+        replica = replicas.choose(_token_subject(request))
+        if replica is not None:
+            session_factory = ReplicaSessionLocals[replica]
+    try:
+        db = session_factory()
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+ReadOnlySessionDep = Annotated[Session, Depends(get_read_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2_v1)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User: 
+def _decode_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
-    except (InvalidTokenError, ValidationError):
+        return TokenPayload(**payload)
+    except (InvalidTokenError, JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if not getattr(user, "is_active", False):
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
 
 
-def get_current_superuser(session: SessionDep, token: TokenDep) -> User:  # type: ignore
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (InvalidTokenError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
-    user = session.get(User, token_data.sub)
-    if not user:
+def _check_principal(principal: Optional[UserPrincipal], superuser: bool) -> UserPrincipal:
+    if not principal or not principal.is_active:
         raise HTTPException(status_code=404, detail="User not found")
-    if not getattr(user, "is_active", False):
-        raise HTTPException(status_code=404, detail="User not found")
-    if not getattr(user, "is_superuser", False):
+    if superuser and not principal.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user does not have enough privileges"
         )
-    return user
+    return principal
+
+
+def _read_principal(session: Session, token: str, superuser: bool = False) -> UserPrincipal:
+    """
+    Resolve the token's user through `security.principal_cache`, hitting the database only on a miss.
+    """
+    token_data = _decode_token(token)
+    principal = security.principal_cache.get(token_data.sub)
+    if principal is None:
+        user = session.get(User, token_data.sub)
+        if user:
+            principal = UserPrincipal.model_validate(user)
+            security.principal_cache.set(token_data.sub, principal)
+    return _check_principal(principal, superuser)
+
+
+async def _read_principal_async(session: AsyncSession, token: str, superuser: bool = False) -> UserPrincipal:
+    token_data = _decode_token(token)
+    principal = security.principal_cache.get(token_data.sub)
+    if principal is None:
+        user = await session.get(User, token_data.sub)
+        if user:
+            principal = UserPrincipal.model_validate(user)
+            security.principal_cache.set(token_data.sub, principal)
+    return _check_principal(principal, superuser)
+
+
+def get_current_user(session: ReadOnlySessionDep, token: TokenDep) -> UserPrincipal:
+    return _read_principal(session, token)
+
+
+def get_current_superuser(session: ReadOnlySessionDep, token: TokenDep) -> UserPrincipal:
+    return _read_principal(session, token, superuser=True)
+
+
+# Routes on `get_db` authenticate on that same session. With `get_current_user` a principal
+# cache miss would check out a second connection for the read-only session.
+def get_current_user_rw(session: SessionDep, token: TokenDep) -> UserPrincipal:
+    return _read_principal(session, token)
+
+
+def get_current_superuser_rw(session: SessionDep, token: TokenDep) -> UserPrincipal:
+    return _read_principal(session, token, superuser=True)
+
+
+async def get_current_user_async(session: AsyncSessionDep, token: TokenDep) -> UserPrincipal:
+    return await _read_principal_async(session, token)
+
+
+async def get_current_superuser_async(session: AsyncSessionDep, token: TokenDep) -> UserPrincipal:
+    return await _read_principal_async(session, token, superuser=True)
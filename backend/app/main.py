@@ -1,20 +1,83 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
 import json
 import logging
 
 from app.db.sql.base_class import Base
 from app.core.config import settings
-from sqlalchemy import create_engine
-from sqlalchemy.pool import NullPool
+from app.core import metrics, security
+from app.core.admission import AdmissionMiddleware
+from app.core.query_audit import QueryAuditMiddleware
+from app.crud.sql.entity_cache import CacheInvalidationListener, entity_cache
+from app.db.sql.pool import pool_sizing, warm_up_async_pool, warm_up_pool
+from app.db.sql.session import async_engine, engine, replicas
 from app.api.routers import api  
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Settle the bcrypt cost before the first login pays for calibration
+    await run_in_threadpool(security.ensure_password_rounds)
+    if settings.DB_POOL_WARMUP > 0 and settings.SQLALCHEMY_ASYNC:
+        await warm_up_async_pool(async_engine, settings.DB_POOL_WARMUP)
+    elif settings.DB_POOL_WARMUP > 0:
+        await run_in_threadpool(warm_up_pool, engine, settings.DB_POOL_WARMUP)
+    # Measure replica lag in the background, so requests only read the last measurement
+    replicas.start()
+    # Apply entity cache invalidations published by the other workers
+    listener = None
+    if entity_cache is not None and entity_cache.channel:
+        listener = CacheInvalidationListener(entity_cache, str(settings.SQLALCHEMY_DATABASE_URI))
+        listener.start()
+    yield
+    if listener is not None:
+        listener.stop()
+    replicas.stop()
+    # Hashing processes would otherwise outlive the worker and hold up the server's exit
+    security.shutdown_hashing_executor()
+    metrics.mark_process_dead()
+
+
 app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json", debug=True
+    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json", debug=True, lifespan=lifespan
 )
 
+metrics.install_sqlalchemy_hooks()
+
+# Added before MetricsMiddleware so it runs inside it, and shed requests are still measured.
+# The default class gets the worker's pool share since a request holds at most one connection:
+# the principal lookup shares the route's session (`get_current_user_rw` on `get_db` routes).
+if settings.ADMISSION_CONTROL_ENABLED:
+    pool_share = sum(
+        pool_sizing(settings.DB_CONNECTION_BUDGET, settings.WEB_CONCURRENCY, settings.DB_POOL_OVERFLOW_RATIO)
+    )
+    app.add_middleware(
+        AdmissionMiddleware,
+        prefix=settings.API_V1_STR,
+        limits={
+            # Queued here rather than shed by `security.login_slot`, which stays the limit without admission
+            "login": min(settings.ADMISSION_LOGIN_CONCURRENCY, settings.LOGIN_QUEUE_SIZE),
+            "admin": settings.ADMISSION_ADMIN_CONCURRENCY,
+            "bulk": settings.ADMISSION_BULK_CONCURRENCY,
+            "default": settings.ADMISSION_DEFAULT_CONCURRENCY or pool_share,
+        },
+        queue_size=settings.ADMISSION_QUEUE_SIZE,
+        max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+app.add_middleware(metrics.MetricsMiddleware)
+
+if settings.QUERY_AUDIT_ENABLED:
+    app.add_middleware(
+        QueryAuditMiddleware,
+        max_statements=settings.QUERY_AUDIT_MAX_STATEMENTS,
+        repeat_threshold=settings.QUERY_AUDIT_REPEAT_THRESHOLD,
+    )
+
 
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
@@ -24,15 +87,15 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated"],
     )
 
 app.include_router(api.api_router, prefix=settings.API_V1_STR)
 
-assert settings.SQLALCHEMY_DATABASE_URI is not None, "SQLALCHEMY_DATABASE_URI must be set"
-engine = create_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI),
-    pool_size=300,
-    max_overflow=600,
-    pool_timeout=60,
-    pool_recycle=1800
-)
\ No newline at end of file
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics() -> Response:
+    """
+    Prometheus scrape endpoint, aggregated across workers in multiprocess mode.
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
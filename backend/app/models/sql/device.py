@@ -9,6 +9,8 @@ from app.db.sql.base_class import Base
 
 
 class Device(Base):
+    trigram_columns = ("name", "model", "serial_number")
+
     # Device properties
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
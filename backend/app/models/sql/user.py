@@ -12,8 +12,8 @@ class User(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, index=True, nullable=False, unique=True)
-    full_name = Column(String, index=True, nullable=False)
-    hashed_password = Column(String, index=True, nullable=False)
-    is_active = Column(Boolean, default=True, index=True)
-    is_superuser = Column(Boolean, default=False, index=True)
+    full_name = Column(String, nullable=False)
+    hashed_password = Column(String, nullable=False)
+    is_active = Column(Boolean, default=True)
+    is_superuser = Column(Boolean, default=False)
 
@@ -45,5 +45,7 @@ This pattern keeps your code DRY, clear, and secure—ensuring you never expose
 """
 
 from .token import Token, TokenPayload, NewPassword, UpdatePassword
-from .user import User, UserBase, UserCreate, UserInDBase, UserUpdate
-from .device import Device, DeviceBase, DeviceCreate, DeviceInDB, DeviceUpdate
+from .user import User, UserBase, UserCreate, UserInDBase, UserUpdate, UserPrincipal
+from .device import Device, DeviceBase, DeviceCreate, DeviceInDB, DeviceUpdate, DeviceBulkItem, DeviceBulkResult
+from .internal import PoolStats, DatabasePoolStats
+from .serialization import list_adapter, dump_json_list
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 
@@ -30,3 +30,16 @@ class DeviceInDB(DeviceBase):
 
 class Device(DeviceInDB):
     pass
+
+class DeviceBulkItem(BaseModel):
+    # Outcome for one entry of a bulk request, `index` is its position in the request body
+    index: int
+    serial_number: str
+    status: Literal["inserted", "updated", "conflict"]
+    id: Optional[UUID] = None
+
+class DeviceBulkResult(BaseModel):
+    inserted: int
+    updated: int
+    conflicts: int
+    items: List[DeviceBulkItem]
@@ -0,0 +1,24 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    timeout: float
+    # Time checkouts spent waiting for a connection since the pool was created
+    wait_count: Optional[int] = None
+    wait_seconds_total: Optional[float] = None
+    wait_seconds_max: Optional[float] = None
+
+
+class DatabasePoolStats(BaseModel):
+    sync_engine: PoolStats
+    async_engine: PoolStats
+    replica_engines: List[PoolStats] = []
+    # Last measured replay lag per replica, in `DB_REPLICA_URLS` order; null until measured
+    # or after a failed check
+    replica_lag_seconds: List[Optional[float]] = []
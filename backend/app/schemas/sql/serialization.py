@@ -0,0 +1,20 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+# Rationale:
+# - Building a `TypeAdapter` compiles a validator and serializer, so do it once per schema.
+# - List endpoints validate ORM objects once and dump them straight to JSON bytes, then return
+#   a raw `Response`. FastAPI skips its own `response_model` validation/encoding for a returned
+#   `Response`, while `response_model` on the route still documents the body in OpenAPI.
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])  # type: ignore[valid-type]
+
+
+def dump_json_list(schema: Type[BaseModel], objs: Iterable[Any]) -> bytes:
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(objs))
@@ -27,3 +27,12 @@ class UserInDBase(UserBase):
 
 class User(UserBase):
     id: UUID
+
+
+class UserPrincipal(BaseModel):
+    # What authorization needs from a user; small enough to cache per token subject
+    id: UUID
+    is_active: Optional[bool] = False
+    is_superuser: Optional[bool] = False
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
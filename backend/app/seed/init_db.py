@@ -1,18 +1,28 @@
-import uuid
+import logging
+
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app import crud, schemas, models
 from app.core.config import settings
 
 
+logger = logging.getLogger(__name__)
+
+
 def init_sql(db: Session) -> None:
+    # Seed writes commit once, together
+    with crud.sql.transaction(db):
+        _seed(db)
+
+
+def _seed(db: Session) -> None:
     user = crud.sql.user.read_by_column(
         db, column=models.sql.User.email, value=settings.FIRST_SUPERUSER_USERNAME
     )
 
 
     if not user:
-        super_user = schemas.sql.UserCreate(
+        superuser_in = schemas.sql.UserCreate(
             email=settings.FIRST_SUPERUSER_USERNAME,
             password=settings.FIRST_SUPERUSER_PASSWORD,
             is_active=True,
@@ -20,5 +30,5 @@ def init_sql(db: Session) -> None:
             full_name="Superuser",
         )
 
-        user = crud.sql.user.create(db, obj_in=super_user)
-        print(f"Created first super user {super}")
+        user = crud.sql.user.create(db, obj_in=superuser_in)
+        logger.info("Created first superuser %s", user.email)
@@ -1,24 +0,0 @@
-import logging
-
-from app.seed.init_db import init_sql
-from app.db.sql.session import SessionLocal
-
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-
-def init() -> None:
-    db = SessionLocal()
-
-    init_sql(db)
-
-
-def main() -> None:
-    logger.info("Creating initial data")
-    init()
-    logger.info("Initial data created")
-
-
-if __name__ == "__main__":
-    main()
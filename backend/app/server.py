@@ -0,0 +1,253 @@
+"""
+Server launcher
+===============
+
+Starts uvicorn with settings derived from the machine and `Settings`, instead of the
+fixed `--workers 4 --reload` of `fastapi run`:
+
+- Workers: WEB_CONCURRENCY when set explicitly, otherwise one per CPU available to the
+  container, which is the smaller of the CPU affinity mask and the cgroup CPU quota.
+  The chosen count is exported as WEB_CONCURRENCY, so each worker sizes its connection
+  pool for it (see `engine_options`).
+- uvloop and httptools when they are installed, else asyncio and h11.
+- bcrypt cost: when PASSWORD_BCRYPT_ROUNDS is unset, it is calibrated once here and
+  exported, so every worker hashes with the same cost instead of measuring its own.
+- Keep-alive timeout, listen backlog and graceful shutdown timeout from the SERVER_*
+  settings.
+- Connection budget: refuses to start when the workers' pools together could open more
+  connections than DB_CONNECTION_BUDGET (DB_REPLICA_CONNECTION_BUDGET on each replica),
+  or when they and the per-worker cache listeners could open more than Postgres accepts
+  (`max_connections` minus the reserved slots).
+- SIGTERM stops accepting connections, lets requests in flight finish for up to
+  SERVER_GRACEFUL_SHUTDOWN_SECONDS, runs the lifespan shutdown and exits. Keep the
+  container's stop timeout above that.
+- `--dev` runs a single worker with the reloader; production never watches files.
+
+    python -m app.server
+    python -m app.server --dev
+"""
+
+import argparse
+import importlib.util
+import logging
+import math
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import uvicorn
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.security import calibrate_bcrypt_rounds
+from app.db.sql.pool import pool_sizing
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+CONNECTION_LIMIT_SQL = text(
+    """
+    SELECT current_setting('max_connections')::int
+           - current_setting('superuser_reserved_connections')::int
+           - COALESCE(current_setting('reserved_connections', true), '0')::int
+    """
+)
+
+
+class ConnectionBudgetError(Exception):
+    pass
+
+
+def cgroup_cpu_limit(root: Path = CGROUP_ROOT) -> Optional[float]:
+    """
+    CPUs allowed by the cgroup CPU quota (v2 `cpu.max`, or v1 CFS quota), None if unlimited.
+    """
+    try:
+        quota, period = (root / "cpu.max").read_text().split()
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota_us = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period_us = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return quota_us / period_us
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit(root)
+    if limit is not None:
+        # A quota of 1.5 CPUs still keeps two workers busy part of the time
+        cpus = min(cpus, math.ceil(limit))
+    return max(cpus, 1)
+
+
+def worker_count() -> int:
+    if "WEB_CONCURRENCY" in settings.model_fields_set:
+        return max(settings.WEB_CONCURRENCY, 1)
+    return available_cpus()
+
+
+@dataclass
+class ConnectionDemand:
+    workers: int
+    pool_size: int
+    max_overflow: int
+    # Connections per worker outside the pools (cache invalidation listener)
+    extra: int
+    # Each worker's pool on every one of `replicas` read replicas
+    replicas: int = 0
+    replica_pool_size: int = 0
+    replica_max_overflow: int = 0
+
+    @property
+    def pooled(self) -> int:
+        return self.workers * (self.pool_size + self.max_overflow)
+
+    @property
+    def total(self) -> int:
+        return self.pooled + self.workers * self.extra
+
+    @property
+    def replica_pooled(self) -> int:
+        # On each replica
+        return self.workers * (self.replica_pool_size + self.replica_max_overflow)
+
+
+def connection_demand(workers: int) -> ConnectionDemand:
+    """
+    Connections the workers can open on the primary and on each replica. Requests use
+    either the sync or the async engine (SQLALCHEMY_ASYNC), so one pool per worker counts.
+    """
+    pool_size, max_overflow = pool_sizing(settings.DB_CONNECTION_BUDGET, workers, settings.DB_POOL_OVERFLOW_RATIO)
+    replica_pool_size, replica_max_overflow = pool_sizing(
+        settings.DB_REPLICA_CONNECTION_BUDGET, workers, settings.DB_POOL_OVERFLOW_RATIO
+    )
+    replicas = len([url for url in settings.DB_REPLICA_URLS if url])
+    return ConnectionDemand(
+        workers=workers,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        extra=1 if settings.ENTITY_CACHE_BACKEND == "memory" else 0,
+        replicas=replicas,
+        replica_pool_size=replica_pool_size if replicas else 0,
+        replica_max_overflow=replica_max_overflow if replicas else 0,
+    )
+
+
+def check_connection_budget(demand: ConnectionDemand, server_limit: Optional[int]) -> None:
+    """
+    Raises:
+        ConnectionBudgetError: If the workers could open more connections than allowed.
+    """
+    # Only when there are more workers than budgeted connections, as each pool gets at least one
+    if demand.pooled > settings.DB_CONNECTION_BUDGET:
+        raise ConnectionBudgetError(
+            f"{demand.workers} workers pool up to {demand.pooled} connections, over DB_CONNECTION_BUDGET="
+            f"{settings.DB_CONNECTION_BUDGET}; lower WEB_CONCURRENCY or raise the budget"
+        )
+    if demand.replica_pooled > settings.DB_REPLICA_CONNECTION_BUDGET:
+        raise ConnectionBudgetError(
+            f"{demand.workers} workers pool up to {demand.replica_pooled} connections on each replica, over "
+            f"DB_REPLICA_CONNECTION_BUDGET={settings.DB_REPLICA_CONNECTION_BUDGET}"
+        )
+    if server_limit is not None and demand.total > server_limit:
+        raise ConnectionBudgetError(
+            f"{demand.workers} workers need up to {demand.total} connections, but Postgres accepts "
+            f"{server_limit} (max_connections minus reserved); lower DB_CONNECTION_BUDGET"
+        )
+
+
+def server_connection_limit() -> int:
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            return connection.execute(CONNECTION_LIMIT_SQL).scalar_one()
+    finally:
+        engine.dispose()
+
+
+def pin_password_rounds() -> int:
+    """
+    Calibrate the bcrypt cost for all workers, unless PASSWORD_BCRYPT_ROUNDS is set, and
+    export it for the spawned workers to read.
+    """
+    if settings.PASSWORD_BCRYPT_ROUNDS is None:
+        settings.PASSWORD_BCRYPT_ROUNDS = calibrate_bcrypt_rounds(
+            settings.PASSWORD_HASH_TARGET_MS, settings.PASSWORD_BCRYPT_MIN_ROUNDS
+        )
+        settings.PASSWORD_BCRYPT_ROUNDS_CALIBRATED = True
+        os.environ["PASSWORD_BCRYPT_ROUNDS"] = str(settings.PASSWORD_BCRYPT_ROUNDS)
+        os.environ["PASSWORD_BCRYPT_ROUNDS_CALIBRATED"] = "true"
+    return settings.PASSWORD_BCRYPT_ROUNDS
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description=__doc__.split("\n\n")[1])
+    parser.add_argument("--dev", action="store_true", help="One worker with auto-reload on code changes")
+    parser.add_argument(
+        "--skip-db-check", action="store_true", help="Do not compare the connection demand with max_connections"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    workers = 1 if args.dev else worker_count()
+    demand = connection_demand(workers)
+    try:
+        check_connection_budget(demand, None if args.skip_db_check else server_connection_limit())
+    except ConnectionBudgetError as e:
+        logger.error("Refusing to start: %s", e)
+        sys.exit(1)
+    # Spawned workers read their pool size from this
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    rounds = pin_password_rounds()
+
+    loop, http = event_loop(), http_protocol()
+    logger.info(
+        "Starting %s worker(s) on %s:%s (%s, %s), pool %s+%s each, up to %s DB connections, bcrypt cost %s",
+        workers, settings.SERVER_HOST, settings.SERVER_PORT, loop, http,
+        demand.pool_size, demand.max_overflow, demand.total, rounds,
+    )
+    if demand.replicas:
+        logger.info(
+            "Replica pools %s+%s each, up to %s connections on each of %s replica(s)",
+            demand.replica_pool_size, demand.replica_max_overflow, demand.replica_pooled, demand.replicas,
+        )
+    uvicorn.run(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=None if args.dev else workers,
+        reload=args.dev,
+        loop=loop,
+        http=http,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
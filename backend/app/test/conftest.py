@@ -1,16 +1,43 @@
 # backend\app\test\conftest.py
 
+import os
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
-from app.main import app
 from app.core.config import settings
+from app.test.utils.database import clone_database, drop_database, use_database, worker_database_url
+
+# Under pytest-xdist each worker gets its own clone of the test database. The settings have
+# to point at it before the app below creates its engines.
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+WORKER_DATABASE_URL = None
+if XDIST_WORKER:
+    WORKER_DATABASE_URL = worker_database_url(settings, XDIST_WORKER)
+    clone_database(make_url(str(settings.SQLALCHEMY_DATABASE_URI)), WORKER_DATABASE_URL)
+    use_database(settings, WORKER_DATABASE_URL)
+
+from app.main import app
+from app import crud
+from app.core.cache import LRUCache, RedisCache
+from app.core.security import principal_cache
+from app.crud.sql.entity_cache import EntityCache
+from app.db.sql.query_counter import QueryCounter
 from app import dependencies
 
+def pytest_unconfigure(config):
+    if WORKER_DATABASE_URL is not None:
+        drop_database(WORKER_DATABASE_URL)
+
+
 @pytest.fixture(scope="session")
 def engine():
-    return create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    yield engine
+    engine.dispose()
 
 
 @pytest.fixture(scope="function")
@@ -21,6 +48,7 @@ def db_session(engine):
     TestingSessionLocal = sessionmaker(
         autocommit=False,
         autoflush=False,
+        expire_on_commit=False,
         bind=connection
     )
 
@@ -43,12 +71,70 @@ def client(db_session):
             pass
 
     app.dependency_overrides[dependencies.get_db] = override_get_db
+    app.dependency_overrides[dependencies.get_read_db] = override_get_db
 
     with TestClient(app) as c:
         yield c
 
     app.dependency_overrides.clear()
 
+
+@pytest.fixture(scope="function")
+def forbid_read_db(client):
+    """
+    Fail requests that open the read-only session. `client` serves `get_db` and `get_read_db`
+    from the same `db_session`, which hides a route checking out a connection for each.
+    """
+    def override_get_read_db():
+        raise AssertionError("get_read_db used by a route on get_db")
+        yield
+
+    app.dependency_overrides[dependencies.get_read_db] = override_get_read_db
+    principal_cache.clear()
+    return client
+
+
+@pytest.fixture(scope="function")
+def assert_max_queries(engine):
+    """
+    Fail if the block runs more than `n` SQL statements, or repeats one statement shape
+    `repeat_threshold` times:
+
+        with assert_max_queries(2):
+            client.get(...)
+
+    The principal cache is cleared first so budgets do not depend on test order.
+    """
+    @contextmanager
+    def _assert_max_queries(n: int, repeat_threshold: int = 3):
+        principal_cache.clear()
+        with QueryCounter(engine) as queries:
+            yield queries
+        assert queries.count <= n, f"{queries.count} statements, budget {n}:\n" + "\n".join(queries.statements)
+        assert not queries.repeated(repeat_threshold), f"Repeated statements: {queries.repeated(repeat_threshold)}"
+
+    return _assert_max_queries
+
+@pytest.fixture(scope="function")
+def device_cache(request):
+    """
+    Enable the entity cache on `crud.sql.device` for one test. Parametrize indirectly with
+    "memory" or "redis" (served by fakeredis).
+    """
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        backend = RedisCache(fakeredis.FakeRedis(), ttl=60, prefix="test-entity:")
+    else:
+        backend = LRUCache(maxsize=1000, ttl=60)
+    cache = EntityCache(backend, negative_ttl=5)
+    original = crud.sql.device.cache
+    crud.sql.device.cache = cache
+    try:
+        yield cache
+    finally:
+        crud.sql.device.cache = original
+
+
 # --- Import and Register Factory Fixtures ---
 
 from app.test.fixtures.factory import (
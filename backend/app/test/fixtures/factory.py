@@ -5,9 +5,7 @@ from factory.alchemy import SQLAlchemyModelFactory
 from factory.declarations import Sequence, SubFactory, SelfAttribute
 import factory
 
-from app.core.security import get_password_hash
-
-from app.test.utils.utils import random_email, random_serial_number
+from app.test.utils.utils import get_password_hash_cached, random_email, random_serial_number
 from app import models
 
 @pytest.fixture
@@ -20,7 +18,7 @@ def user_factory(db_session):
 
         email = random_email
         full_name = Sequence(lambda n: f"Test User {n}")
-        hashed_password = get_password_hash("testuser")
+        hashed_password = get_password_hash_cached("testuser")
         is_active = True
         is_superuser = False
 
@@ -0,0 +1,38 @@
+from app.db.index_advisor import IndexInfo, analyze, database_indexes, declared_indexes
+from app.db.sql.base import Base
+
+
+"""Test app/db/index_advisor"""
+
+
+def test_analyze_reports_unused_duplicate_and_missing():
+    declared = {
+        ("device", "ix_device_serial_number"): IndexInfo("device", "ix_device_serial_number", ("serial_number",), unique=True),
+        ("device", "ix_device_model"): IndexInfo("device", "ix_device_model", ("model",)),
+    }
+    actual = {
+        ("device", "ix_device_serial_number"): IndexInfo("device", "ix_device_serial_number", ("serial_number",), unique=True, scans=0),
+        ("device", "ix_device_name"): IndexInfo("device", "ix_device_name", ("name",), scans=0, definition="CREATE INDEX ..."),
+        ("device", "ix_device_name_model"): IndexInfo("device", "ix_device_name_model", ("name", "model"), scans=7),
+    }
+
+    findings = {(finding.kind, finding.index) for finding in analyze(declared, actual)}
+
+    assert findings == {
+        ("unused", "ix_device_name"),
+        ("duplicate", "ix_device_name"),
+        ("missing", "ix_device_model"),
+        ("undeclared", "ix_device_name"),
+        ("undeclared", "ix_device_name_model"),
+    }
+
+
+def test_declared_indexes_match_database_names(engine):
+    declared = declared_indexes(Base.metadata)
+    with engine.connect() as connection:
+        actual = database_indexes(connection)
+
+    assert ("user", "ix_user_email") in declared
+    assert ("user", "ix_user_hashed_password") not in declared
+    assert actual[("user", "ix_user_email")].unique
+    assert actual[("user", "ix_user_email")].columns == ("email",)
@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InvalidRequestError
+
+from app import models
+from app.db.sql.session import ReadOnlySessionLocal, engine as primary_engine
+
+
+"""Test app/db/sql/session"""
+
+
+def test_read_only_session_rejects_writes():
+    with ReadOnlySessionLocal() as db:
+        assert db.execute(text("SHOW transaction_read_only")).scalar() == "on"
+        assert db.execute(text("SHOW transaction_deferrable")).scalar() == "on"
+
+        db.add(models.sql.Device(name="d", serial_number="read-only", model="m"))
+        with pytest.raises(InvalidRequestError, match="read-only"):
+            db.flush()
+        db.expunge_all()
+
+        # Statements that bypass the unit of work are refused by the server
+        with pytest.raises(DBAPIError, match="read-only transaction"):
+            db.execute(text("UPDATE device SET name = name WHERE false"))
+
+
+def test_read_only_mode_is_reset_on_return():
+    # The read-only sessions share the primary's pool, so a write request may get the same connection
+    with ReadOnlySessionLocal() as db:
+        db.execute(text("SELECT 1"))
+
+    with primary_engine.connect() as connection:
+        assert connection.execute(text("SHOW transaction_read_only")).scalar() == "off"
+        assert connection.execute(text("SHOW transaction_deferrable")).scalar() == "off"
@@ -1,17 +1,31 @@
+import csv
+import io
+import json
+
 import pytest
+from sqlalchemy import event, text
 from app.core.config import settings
-from app.test.utils.utils import get_test_token_by_user, get_admin_token,get_random_str
-from app import schemas
+from app.test.utils.utils import get_token_headers, get_admin_token,get_random_str
+from app import crud, models, schemas
+from app.crud.sql import base
+from app.db.sql.replicas import REPLICA_SESSION_INFO
 
 
 """Test api/v1/devices/"""
 
+# SQL statement budgets per request, see the `assert_max_queries` fixture
+BUDGET_CREATE = 2
+BUDGET_BULK = 2
+BUDGET_EXPORT = 2
+
 
 @pytest.mark.parametrize("mock_devices", [1, 3, 5], indirect=True)
-def test_get_devices(client, mock_devices):
+def test_get_devices(client, db_session, mock_devices, assert_max_queries):
     devices = mock_devices
-    headers = get_admin_token(client=client)
-    response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers)
+    headers = get_admin_token(db_session)
+    # Principal lookup and the device page, whatever the number of devices
+    with assert_max_queries(2):
+        response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers)
 
     assert response.status_code == 200
     response_data = response.json()
@@ -19,10 +33,10 @@ def test_get_devices(client, mock_devices):
     assert len(response_data) == len(devices)
 
 @pytest.mark.parametrize("mock_multiple_users", [1, 3, 5], indirect=True)
-def test_create_devices(client, mock_multiple_users):
+def test_create_devices(client, mock_multiple_users, assert_max_queries):
     """Each user should be able to create one device via POST /devices/"""
     for user in mock_multiple_users:
-        headers = get_test_token_by_user(client, user.email, "testuser")
+        headers = get_token_headers(user.id)
 
         data = schemas.sql.DeviceCreate(
             name="test-device",
@@ -30,11 +44,12 @@ def test_create_devices(client, mock_multiple_users):
             model=get_random_str()
         )
 
-        response = client.post(
-            f"{settings.API_V1_STR}/devices/",
-            headers=headers,
-            json=data.model_dump() 
-        )
+        with assert_max_queries(BUDGET_CREATE):
+            response = client.post(
+                f"{settings.API_V1_STR}/devices/",
+                headers=headers,
+                json=data.model_dump() 
+            )
 
         assert response.status_code == 201, response.text
         response_data = response.json()
@@ -44,3 +59,316 @@ def test_create_devices(client, mock_multiple_users):
         assert response_data["serial_number"] == data.serial_number
         assert response_data["name"] == data.name
         assert response_data["model"] == data.model
+
+
+def test_write_routes_authenticate_on_their_own_session(forbid_read_db, db_session):
+    """The principal lookup shares the route's read-write session on a cache miss"""
+    client = forbid_read_db
+    headers = get_admin_token(db_session)
+    data = schemas.sql.DeviceCreate(name="test-device", serial_number=get_random_str(), model=get_random_str())
+
+    response = client.post(f"{settings.API_V1_STR}/devices/", headers=headers, json=data.model_dump())
+    assert response.status_code == 201, response.text
+    response = client.post(f"{settings.API_V1_STR}/devices/bulk", headers=headers, json=[data.model_dump()])
+    assert response.status_code == 200, response.text
+    response = client.get(f"{settings.API_V1_STR}/devices/export", headers=headers)
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("mock_devices", [5], indirect=True)
+def test_get_devices_keyset_pagination(client, db_session, mock_devices, assert_max_queries):
+    """Following X-Next-Cursor walks every device exactly once"""
+    headers = get_admin_token(db_session)
+    seen = []
+    params = {"limit": 2}
+
+    while True:
+        with assert_max_queries(2):
+            response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        seen.extend(device["id"] for device in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        params = {"limit": 2, "cursor": next_cursor}
+
+    assert len(seen) == len(set(seen)) == len(mock_devices)
+
+
+def test_get_devices_invalid_cursor(client, db_session):
+    headers = get_admin_token(db_session)
+    response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+def test_get_devices_filtered_and_sorted(client, db_session, device_factory, assert_max_queries):
+    """Filters and sort apply across keyset pages"""
+    device_factory.create_batch(3, model="filter-a", name="alpha")
+    device_factory.create_batch(2, model="filter-b", name="beta")
+    device_factory.create(model="filter-a", name="gamma")
+    headers = get_admin_token(db_session)
+    seen = []
+    params = {"filter": ["model:eq:filter-a", "name:prefix:al"], "sort": "-serial_number", "limit": 2}
+
+    while True:
+        with assert_max_queries(2):
+            response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        seen.extend(response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        params["cursor"] = next_cursor
+
+    assert {(d["model"], d["name"]) for d in seen} == {("filter-a", "alpha")}
+    serials = [d["serial_number"] for d in seen]
+    assert len(serials) == 3
+    assert serials == sorted(serials, reverse=True)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"filter": "updated_at:eq:2024-01-01"},
+        {"filter": "model:like:X"},
+        {"filter": "model"},
+        {"filter": "created_at:gt:yesterday"},
+        {"filter": "created_at:prefix:2024"},
+        {"sort": "name"},
+    ],
+)
+def test_get_devices_rejects_invalid_query(client, db_session, params):
+    headers = get_admin_token(db_session)
+    response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params=params)
+
+    assert response.status_code == 400, response.text
+
+
+def test_get_devices_total_count(client, db_session, device_factory, assert_max_queries):
+    model = get_random_str()
+    device_factory.create_batch(3, model=model)
+    headers = get_admin_token(db_session)
+    params = {"filter": [f"model:eq:{model}"], "limit": 1}
+
+    # The count adds one statement to the page's budget
+    with assert_max_queries(3):
+        response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params={**params, "count": "exact"})
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Total-Count"] == "3"
+    assert "X-Total-Count-Estimated" not in response.headers
+
+    response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params={**params, "count": "cached"})
+    assert response.headers["X-Total-Count"] == "3"
+    assert response.headers["X-Total-Count-Estimated"] == "true"
+    device_factory.create(model=model)
+    response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params={**params, "count": "cached"})
+    assert response.headers["X-Total-Count"] == "3"
+
+    for estimated_params in ({"count": "estimated"}, {**params, "filter": [f"model:in:{model},other"], "count": "estimated"}):
+        response = client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params=estimated_params)
+        assert response.status_code == 200, response.text
+        assert int(response.headers["X-Total-Count"]) >= 0
+        assert response.headers["X-Total-Count-Estimated"] == "true"
+
+
+@pytest.fixture
+def pg_trgm(engine):
+    # Migration a3c1f2d4b5e6 skips the extension on servers that do not ship it
+    with engine.connect() as connection:
+        if not connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar():
+            pytest.skip("pg_trgm is not installed")
+
+
+def test_search_devices(client, db_session, pg_trgm, device_factory):
+    """Substring matches across name, model and serial number, closest first"""
+    device_factory.create(name="router-alpha", model="RX-1")
+    device_factory.create(name="alpha", model="RX-2")
+    device_factory.create(name="beta", model="alphabet-9")
+    device_factory.create(name="gamma", model="RX-3")
+    headers = get_admin_token(db_session)
+
+    response = client.get(f"{settings.API_V1_STR}/devices/search", headers=headers, params={"q": "ALPHA", "limit": 2})
+
+    assert response.status_code == 200, response.text
+    assert [device["name"] for device in response.json()] == ["alpha", "router-alpha"]
+
+
+def test_search_devices_keeps_exact_matches_past_the_candidate_cap(db_session, pg_trgm, device_factory, monkeypatch):
+    tag = get_random_str()
+    for i in range(5):
+        device_factory.create(name=f"x-{tag}-{i}", model="m")
+    device_factory.create(name=tag, model="m")
+    monkeypatch.setattr(base, "SEARCH_CANDIDATES", 2)
+
+    devices = crud.sql.device.search(db=db_session, q=tag, limit=1)
+    assert [device.name for device in devices] == [tag]
+
+
+def test_search_devices_without_pg_trgm(client, db_session, device_factory, monkeypatch):
+    """Falls back to ILIKE, ranked exact, prefix, then other matches, instead of failing on similarity()"""
+    tag = get_random_str()
+    device_factory.create(name=f"x-{tag}", model="m")
+    device_factory.create(name=f"{tag}-x", model="m")
+    device_factory.create(name="y", model=tag.upper())
+    device_factory.create(name="z", model="m")
+    monkeypatch.setattr(base, "_has_pg_trgm", lambda db: False)
+    headers = get_admin_token(db_session)
+
+    response = client.get(f"{settings.API_V1_STR}/devices/search", headers=headers, params={"q": tag})
+
+    assert response.status_code == 200, response.text
+    assert [device["name"] for device in response.json()] == ["y", f"{tag}-x", f"x-{tag}"]
+
+
+def test_search_devices_requires_three_characters(client, db_session):
+    headers = get_admin_token(db_session)
+    response = client.get(f"{settings.API_V1_STR}/devices/search", headers=headers, params={"q": "ab"})
+
+    assert response.status_code == 422
+
+
+def test_bulk_upsert_devices(client, db_session, device_factory, assert_max_queries):
+    """POST /devices/bulk reports inserted, updated and conflicting rows per item"""
+    existing = device_factory.create()
+    headers = get_admin_token(db_session)
+    new_serial = get_random_str()
+
+    payload = [
+        {"name": "renamed", "serial_number": existing.serial_number, "model": "m"},
+        {"name": "new", "serial_number": new_serial, "model": "m"},
+        {"name": "repeat", "serial_number": new_serial, "model": "m"},
+    ]
+    # One INSERT .. ON CONFLICT per chunk, not one per item
+    with assert_max_queries(BUDGET_BULK):
+        response = client.post(f"{settings.API_V1_STR}/devices/bulk", headers=headers, json=payload)
+
+    assert response.status_code == 200, response.text
+    response_data = response.json()
+    assert [item["status"] for item in response_data["items"]] == ["updated", "inserted", "conflict"]
+    assert (response_data["inserted"], response_data["updated"], response_data["conflicts"]) == (1, 1, 1)
+    assert response_data["items"][0]["id"] == str(existing.id)
+
+
+@pytest.mark.parametrize("mock_devices", [3], indirect=True)
+def test_export_devices(client, db_session, mock_devices, assert_max_queries):
+    headers = get_admin_token(db_session)
+
+    with assert_max_queries(BUDGET_EXPORT):
+        response = client.get(f"{settings.API_V1_STR}/devices/export", headers=headers, params={"format": "ndjson"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert len(lines) == len(mock_devices)
+    assert {json.loads(line)["serial_number"] for line in lines} == {d.serial_number for d in mock_devices}
+
+    response = client.get(f"{settings.API_V1_STR}/devices/export", headers=headers, params={"format": "csv"})
+    assert response.status_code == 200, response.text
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {row["serial_number"] for row in rows} == {d.serial_number for d in mock_devices}
+
+
+@pytest.mark.parametrize("device_cache", ["memory", "redis"], indirect=True)
+def test_read_device_served_from_entity_cache(client, db_session, device_factory, device_cache, assert_max_queries):
+    device = device_factory.create()
+    headers = get_admin_token(db_session)
+    first = client.get(f"{settings.API_V1_STR}/devices/{device.id}", headers=headers)
+
+    # Only the principal lookup reaches the database
+    with assert_max_queries(1):
+        second = client.get(f"{settings.API_V1_STR}/devices/{device.id}", headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+
+
+@pytest.mark.parametrize("device_cache", ["memory", "redis"], indirect=True)
+def test_entity_cache_negative_entry_invalidated_on_create(client, db_session, device_cache):
+    """The cached "serial does not exist" answer must not outlive the insert"""
+    headers = get_admin_token(db_session)
+    payload = {"name": "cached", "serial_number": get_random_str(), "model": "m"}
+    column = models.sql.Device.serial_number
+    key = crud.sql.device._cache_key(column, payload["serial_number"])
+
+    assert crud.sql.device.read_by_column(db_session, column=column, value=payload["serial_number"]) is None
+    assert device_cache.get("device", key) == (True, None)
+
+    response = client.post(f"{settings.API_V1_STR}/devices/", headers=headers, json=payload)
+    assert response.status_code == 201, response.text
+    assert device_cache.get("device", key) == (False, None)
+    device = crud.sql.device.read_by_column(db_session, column=column, value=payload["serial_number"])
+    assert device is not None and str(device.id) == response.json()["id"]
+
+
+@pytest.mark.parametrize("device_cache", ["memory"], indirect=True)
+def test_entity_cache_not_filled_from_replica_reads(db_session, device_factory, device_cache):
+    """A lagging replica must not put stale rows or "not found" answers in the shared cache"""
+    device = device_factory.create()
+    column = models.sql.Device.serial_number
+    missing = get_random_str()
+    db_session.info[REPLICA_SESSION_INFO] = True
+    try:
+        assert crud.sql.device.read_by_column(db_session, column=column, value=device.serial_number) is not None
+        assert crud.sql.device.read_by_column(db_session, column=column, value=missing) is None
+    finally:
+        del db_session.info[REPLICA_SESSION_INFO]
+
+    for value in (device.serial_number, missing):
+        assert device_cache.get("device", crud.sql.device._cache_key(column, value)) == (False, None)
+
+
+@pytest.mark.parametrize("device_cache", ["memory", "redis"], indirect=True)
+def test_entity_cache_invalidated_by_bulk_upsert(client, db_session, device_factory, device_cache):
+    device = device_factory.create()
+    headers = get_admin_token(db_session)
+    client.get(f"{settings.API_V1_STR}/devices/{device.id}", headers=headers)
+
+    payload = [{"name": "renamed", "serial_number": device.serial_number, "model": "m"}]
+    response = client.post(f"{settings.API_V1_STR}/devices/bulk", headers=headers, json=payload)
+    assert response.status_code == 200, response.text
+
+    response = client.get(f"{settings.API_V1_STR}/devices/{device.id}", headers=headers)
+    assert response.json()["name"] == "renamed"
+
+
+def test_create_device_duplicate_serial(client, db_session, device_factory, assert_max_queries):
+    """A duplicate serial is rejected by ON CONFLICT DO NOTHING, without a separate lookup"""
+    existing = device_factory.create()
+    headers = get_admin_token(db_session)
+    payload = {"name": "dup", "serial_number": existing.serial_number, "model": "m"}
+
+    with assert_max_queries(BUDGET_CREATE):
+        response = client.post(f"{settings.API_V1_STR}/devices/", headers=headers, json=payload)
+
+    assert response.status_code == 400, response.text
+
+
+def test_crud_writes_are_single_statements(db_session, assert_max_queries):
+    """create and update each issue one statement and need no refresh afterwards"""
+    obj_in = schemas.sql.DeviceCreate(name="one", serial_number=get_random_str(), model="m")
+
+    with assert_max_queries(1):
+        device = crud.sql.device.create(db=db_session, obj_in=obj_in)
+        assert device.created_at is not None
+
+    with assert_max_queries(1):
+        updated = crud.sql.device.update(db=db_session, db_obj=device, obj_in={"name": "two"})
+        assert updated.name == "two"
+        assert updated.updated_at >= device.created_at
+
+
+def test_transaction_commits_once_and_rolls_back_savepoints(db_session):
+    commits = []
+    event.listen(db_session, "after_commit", commits.append)
+
+    with crud.sql.transaction(db_session):
+        kept = crud.sql.device.create(db=db_session, obj_in=schemas.sql.DeviceCreate(name="kept", serial_number=get_random_str()))
+        with pytest.raises(RuntimeError):
+            with crud.sql.transaction(db_session):
+                dropped = crud.sql.device.create(db=db_session, obj_in=schemas.sql.DeviceCreate(name="dropped", serial_number=get_random_str()))
+                raise RuntimeError("roll back the savepoint")
+        assert commits == []
+
+    assert len(commits) == 1
+    assert crud.sql.device.read(db_session, kept.id) is not None
+    assert crud.sql.device.read(db_session, dropped.id) is None
@@ -0,0 +1,73 @@
+import threading
+
+from app.core.config import settings
+from app.db.sql.replicas import ReplicaSet
+from app.test.utils.utils import get_admin_token, get_test_token_by_user
+
+
+"""Test api/v1/internal/"""
+
+
+def test_read_db_pool_stats(client, db_session):
+    headers = get_admin_token(db_session)
+    response = client.get(f"{settings.API_V1_STR}/internal/db-pool", headers=headers)
+
+    assert response.status_code == 200, response.text
+    stats = response.json()["sync_engine"]
+    assert stats["pool_size"] + stats["max_overflow"] == settings.DB_CONNECTION_BUDGET // settings.WEB_CONCURRENCY
+
+
+def test_metrics_exposes_route_and_query_counters(client):
+    # A real login, so the password hash histogram has a sample
+    headers = get_test_token_by_user(client, settings.FIRST_SUPERUSER_USERNAME, settings.FIRST_SUPERUSER_PASSWORD)
+    client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    response = client.get("/metrics")
+
+    assert response.status_code == 200, response.text
+    body = response.text
+    assert f'route="{settings.API_V1_STR}/users/me"' in body
+    assert "db_queries_total" in body
+    assert 'password_hash_duration_seconds_count{operation="verify"}' in body
+
+
+def test_replica_routing_falls_back_to_primary(engine):
+    # The test database is not in recovery, so it measures as a replica with no lag
+    replicas = ReplicaSet([engine], max_lag=1, check_interval=0, sticky_seconds=60)
+    # Not measured yet
+    assert replicas.choose("1") is None
+    replicas.refresh_lag()
+    assert replicas.choose("1") is engine
+    assert replicas.lag == {0: 0}
+
+    replicas.mark_write("1")
+    assert replicas.choose("1") is None
+    assert replicas.choose("2") is engine
+
+    replicas.lag_probe = lambda replica: 5.0
+    replicas.refresh_lag()
+    assert replicas.choose("2") is None
+
+    def unreachable(replica):
+        raise ConnectionError
+    replicas.lag_probe = unreachable
+    replicas.refresh_lag()
+    assert replicas.choose("2") is None
+
+
+def test_replica_lag_measured_in_background(engine):
+    probed = threading.Event()
+
+    def probe(replica):
+        probed.set()
+        return 0.0
+
+    replicas = ReplicaSet([engine], max_lag=1, check_interval=60, sticky_seconds=60, lag_probe=probe)
+    replicas.start()
+    try:
+        assert probed.wait(5)
+        probed.clear()
+        # Requests only read the last measurement
+        assert replicas.choose("1") is engine
+        assert not probed.is_set()
+    finally:
+        replicas.stop()
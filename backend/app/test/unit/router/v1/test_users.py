@@ -0,0 +1,109 @@
+from fastapi import Request
+from passlib.context import CryptContext
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.security import principal_cache, pwd_context
+from app.test.utils.utils import get_admin_token, get_test_token_by_user, get_token_headers
+from app import crud, dependencies
+from app.db.sql.session import ReadOnlySession
+from app.main import app
+
+
+"""Test api/v1/users/"""
+
+
+def test_read_me_uses_principal_cache(client, user_factory):
+    user = user_factory.create()
+    headers = get_token_headers(user.id)
+
+    misses = principal_cache.misses
+    for _ in range(3):
+        response = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["id"] == str(user.id)
+
+    assert principal_cache.misses == misses + 1
+
+
+def test_read_me_runs_on_the_read_only_session(client, db_session):
+    """`client` hands routes `db_session`; this puts the real `get_read_db` back behind a spy"""
+    headers = get_admin_token(db_session)
+    sessions = []
+
+    def spy_get_read_db(request: Request):
+        for db in dependencies.get_read_db(request):
+            sessions.append((isinstance(db, ReadOnlySession), db.execute(text("SHOW transaction_read_only")).scalar()))
+            yield db
+
+    app.dependency_overrides[dependencies.get_read_db] = spy_get_read_db
+    principal_cache.clear()
+    response = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == settings.FIRST_SUPERUSER_USERNAME
+    assert sessions == [(True, "on")]
+
+
+def test_read_multi_authenticates_on_its_own_session(forbid_read_db, db_session):
+    response = forbid_read_db.get(f"{settings.API_V1_STR}/users/read_multi", headers=get_admin_token(db_session))
+    assert response.status_code == 200, response.text
+
+
+def test_read_multi_filters_users(client, db_session, user_factory):
+    users = user_factory.create_batch(2)
+    headers = get_admin_token(db_session)
+    response = client.get(
+        f"{settings.API_V1_STR}/users/read_multi",
+        headers=headers,
+        params={"filter": [f"email:in:{users[0].email},{users[1].email}"], "sort": "-email"},
+    )
+
+    assert response.status_code == 200, response.text
+    emails = [user["email"] for user in response.json()]
+    assert emails == sorted((user.email for user in users), reverse=True)
+
+
+def test_read_multi_rejects_unindexed_filter(client, db_session):
+    headers = get_admin_token(db_session)
+    response = client.get(
+        f"{settings.API_V1_STR}/users/read_multi", headers=headers, params={"filter": ["is_active:eq:false"]}
+    )
+
+    assert response.status_code == 400, response.text
+
+
+def test_deactivated_user_is_rejected(client, db_session, user_factory):
+    """Deactivating through CRUDUser drops the cached principal right away"""
+    user = user_factory.create()
+    headers = get_token_headers(user.id)
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=headers).status_code == 200
+
+    crud.sql.user.update(db_session, db_obj=user, obj_in={"is_active": False})
+
+    response = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert response.status_code == 404
+
+
+def test_login_upgrades_outdated_hash(client, db_session, user_factory):
+    """A hash below the configured bcrypt cost is replaced on the next successful login"""
+    outdated = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4).hash("testuser")
+    user = user_factory.create(hashed_password=outdated)
+
+    get_test_token_by_user(client, user.email, "testuser")
+
+    db_session.refresh(user)
+    assert user.hashed_password != outdated
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert pwd_context.verify("testuser", user.hashed_password)
+
+
+def test_principal_invalidated_after_transaction_commits(db_session, user_factory):
+    user = user_factory.create()
+    principal_cache.set(str(user.id), "cached")
+
+    with crud.sql.transaction(db_session):
+        crud.sql.user.update(db_session, db_obj=user, obj_in={"is_active": False})
+        # Until the commit, other requests still read the committed row
+        assert principal_cache.get(str(user.id)) == "cached"
+    assert principal_cache.get(str(user.id)) is None
@@ -0,0 +1,182 @@
+import csv
+import io
+import json
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app import crud, dependencies, models, schemas
+from app.api.routers.v1_async import devices, users
+from app.core.config import settings
+from app.test.utils.utils import get_admin_token
+
+
+"""Test the async routers (SQLALCHEMY_ASYNC) against api/v1/devices/ and api/v1/users/"""
+
+
+@pytest.fixture
+def async_client(engine):
+    # NullPool: asyncpg connections must not outlive the TestClient's event loop
+    async_engine = create_async_engine(str(settings.SQLALCHEMY_ASYNC_DATABASE_URI), poolclass=NullPool)
+    session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(devices.router, prefix=f"{settings.API_V1_STR}/devices")
+    app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users")
+    app.dependency_overrides[dependencies.get_async_db] = override_get_async_db
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def device_tag(engine):
+    # The async routes commit for real, so their rows are tagged and removed afterwards
+    tag = f"async-{uuid.uuid4().hex[:8]}"
+    yield tag
+    with engine.begin() as connection:
+        connection.execute(delete(models.sql.Device).where(models.sql.Device.model == tag))
+
+
+def test_async_keyset_pagination(async_client, engine, device_tag):
+    with Session(engine) as db:
+        headers = get_admin_token(db)
+        for i in range(3):
+            crud.sql.device.create(
+                db=db, obj_in=schemas.sql.DeviceCreate(name=f"d{i}", serial_number=f"{device_tag}-{i}", model=device_tag)
+            )
+
+    seen, params = [], {"limit": 2}
+    while True:
+        response = async_client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        seen += [device["serial_number"] for device in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert len(seen) == len(set(seen))
+    assert {f"{device_tag}-{i}" for i in range(3)} <= set(seen)
+
+    response = async_client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params={"cursor": "bogus"})
+    assert response.status_code == 400
+
+    response = async_client.get(f"{settings.API_V1_STR}/users/read_multi", headers=headers, params={"limit": 1})
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 1
+
+
+def test_async_bulk_upsert(async_client, engine, device_tag):
+    with Session(engine) as db:
+        headers = get_admin_token(db)
+    devices_in = [{"name": f"d{i}", "serial_number": f"{device_tag}-{i}", "model": device_tag} for i in range(3)]
+
+    response = async_client.post(f"{settings.API_V1_STR}/devices/bulk", headers=headers, json=devices_in)
+    assert response.status_code == 200, response.text
+    assert response.json()["inserted"] == 3
+
+    devices_in[0]["name"] = "renamed"
+    response = async_client.post(
+        f"{settings.API_V1_STR}/devices/bulk", headers=headers, json=devices_in[:1], params={"on_conflict": "skip"}
+    )
+    assert response.json()["conflicts"] == 1
+    response = async_client.post(f"{settings.API_V1_STR}/devices/bulk", headers=headers, json=devices_in[:1])
+    assert response.json()["updated"] == 1
+
+
+def test_async_export(async_client, engine, device_tag):
+    with Session(engine) as db:
+        headers = get_admin_token(db)
+        crud.sql.device.create(
+            db=db, obj_in=schemas.sql.DeviceCreate(name="exported", serial_number=device_tag, model=device_tag)
+        )
+
+    response = async_client.get(f"{settings.API_V1_STR}/devices/export", headers=headers)
+    assert response.status_code == 200, response.text
+    assert device_tag in {json.loads(line)["serial_number"] for line in response.text.splitlines()}
+
+    response = async_client.get(f"{settings.API_V1_STR}/devices/export", headers=headers, params={"format": "csv"})
+    assert response.status_code == 200, response.text
+    assert device_tag in {row["serial_number"] for row in csv.DictReader(io.StringIO(response.text))}
+
+
+def test_async_filters_and_sort(async_client, engine, device_tag):
+    with Session(engine) as db:
+        headers = get_admin_token(db)
+        for i in range(3):
+            crud.sql.device.create(
+                db=db, obj_in=schemas.sql.DeviceCreate(name=f"d{i}", serial_number=f"{device_tag}-{i}", model=device_tag)
+            )
+
+    params = {"filter": [f"model:eq:{device_tag}"], "sort": "-serial_number", "limit": 2}
+    response = async_client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    serials = [device["serial_number"] for device in response.json()]
+    response = async_client.get(
+        f"{settings.API_V1_STR}/devices/",
+        headers=headers,
+        params={**params, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    serials += [device["serial_number"] for device in response.json()]
+    assert serials == [f"{device_tag}-{i}" for i in (2, 1, 0)]
+
+    response = async_client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params={"filter": ["id:eq:1"]})
+    assert response.status_code == 400
+    response = async_client.get(
+        f"{settings.API_V1_STR}/users/read_multi",
+        headers=headers,
+        params={"filter": [f"email:eq:{settings.FIRST_SUPERUSER_USERNAME}"]},
+    )
+    assert [user["email"] for user in response.json()] == [settings.FIRST_SUPERUSER_USERNAME]
+
+
+def test_async_search(async_client, engine, device_tag):
+    with Session(engine) as db:
+        headers = get_admin_token(db)
+        crud.sql.device.create(
+            db=db, obj_in=schemas.sql.DeviceCreate(name=f"{device_tag}-probe", serial_number=device_tag, model=device_tag)
+        )
+
+    response = async_client.get(f"{settings.API_V1_STR}/devices/search", headers=headers, params={"q": device_tag})
+    assert response.status_code == 200, response.text
+    assert response.json()[0]["serial_number"] == device_tag
+
+
+def test_async_estimated_count_with_filters(async_client, engine):
+    """asyncpg binds positional parameters, so the EXPLAIN must be compiled for its dialect"""
+    with Session(engine) as db:
+        headers = get_admin_token(db)
+    for filters in ([f"model:eq:{uuid.uuid4().hex}"], ["model:in:a,b", "name:prefix:x"]):
+        response = async_client.get(
+            f"{settings.API_V1_STR}/devices/", headers=headers, params={"filter": filters, "count": "estimated"}
+        )
+        assert response.status_code == 200, response.text
+        assert int(response.headers["X-Total-Count"]) >= 0
+        assert response.headers["X-Total-Count-Estimated"] == "true"
+
+    response = async_client.get(f"{settings.API_V1_STR}/users/read_multi", headers=headers, params={"count": "exact"})
+    assert response.status_code == 200, response.text
+    assert int(response.headers["X-Total-Count"]) >= 1
+    assert "X-Total-Count-Estimated" not in response.headers
+
+
+def test_async_create_device_rejects_duplicate_serial(async_client, engine, device_tag):
+    with Session(engine) as db:
+        headers = get_admin_token(db)
+    body = {"name": "d", "serial_number": device_tag, "model": device_tag}
+
+    response = async_client.post(f"{settings.API_V1_STR}/devices/", headers=headers, json=body)
+    assert response.status_code == 201, response.text
+    assert response.json()["serial_number"] == device_tag
+
+    response = async_client.post(f"{settings.API_V1_STR}/devices/", headers=headers, json=body)
+    assert response.status_code == 400
+    assert "already exists" in response.json()["detail"]
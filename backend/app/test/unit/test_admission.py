@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core import security
+from app.core.admission import AdmissionGate, AdmissionMiddleware
+from app.core.config import settings
+from app.main import app
+
+
+"""Test app/core/admission"""
+
+
+def test_gate_queues_then_sheds():
+    async def scenario():
+        gate = AdmissionGate("test", concurrency=1, queue_size=1, max_wait=5)
+        assert await gate.acquire() is None
+
+        waiting = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+        assert await gate.acquire() == "queue_full"
+
+        gate.release()
+        assert await waiting is None
+        assert gate.active == 1 and gate.queued == 0
+
+        gate.max_wait = 0.01
+        assert await gate.acquire() == "timeout"
+        gate.release()
+        assert gate.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_middleware_isolates_priorities_and_rejects_with_retry_after():
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = AdmissionMiddleware(
+        app, prefix="/api/v1", limits={"login": 1, "bulk": 1, "default": 1}, queue_size=0, max_wait=1, retry_after=3
+    )
+    assert middleware.priority("POST", "/api/v1/login/access-token") == "login"
+    assert middleware.priority("GET", "/api/v1/internal/db-pool") == "admin"
+    assert middleware.priority("POST", "/api/v1/devices/bulk") == "bulk"
+    assert middleware.priority("GET", "/api/v1/devices/") == "default"
+    assert middleware.priority("GET", "/metrics") is None
+
+    async def call(method, path):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware({"type": "http", "method": method, "path": path}, None, send)
+        return messages[0]
+
+    async def scenario():
+        bulk = asyncio.ensure_future(call("POST", "/api/v1/devices/bulk"))
+        await asyncio.sleep(0)
+        rejected = await call("POST", "/api/v1/devices/bulk")
+        assert rejected["status"] == 503
+        assert (b"retry-after", b"3") in rejected["headers"]
+
+        # The busy bulk slot does not hold up a login
+        login = asyncio.ensure_future(call("POST", "/api/v1/login/access-token"))
+        await asyncio.sleep(0)
+        release.set()
+        assert (await login)["status"] == 200
+        assert (await bulk)["status"] == 200
+
+    asyncio.run(scenario())
+
+
+def test_login_limit_holds_with_and_without_admission(monkeypatch):
+    # With admission control, its login class never admits more than login_slot accepts
+    admission = next(middleware for middleware in app.user_middleware if middleware.cls is AdmissionMiddleware)
+    assert admission.kwargs["limits"]["login"] <= settings.LOGIN_QUEUE_SIZE
+
+    # Without it, login_slot sheds the attempts over LOGIN_QUEUE_SIZE
+    monkeypatch.setattr(security, "_login_slots", threading.BoundedSemaphore(1))
+    with security.login_slot():
+        with pytest.raises(security.LoginQueueFull):
+            with security.login_slot():
+                pass
+    with security.login_slot():
+        pass
@@ -0,0 +1,29 @@
+from sqlalchemy import text
+
+from app import boot
+
+
+"""Test app/boot"""
+
+
+def test_advisory_lock_excludes_other_sessions(engine):
+    boot_engine = boot.create_boot_engine()
+    try_lock = text("SELECT pg_try_advisory_lock(:key)")
+    with engine.connect() as other:
+        with boot.advisory_lock(boot_engine):
+            assert other.execute(try_lock, {"key": boot.BOOT_LOCK_KEY}).scalar() is False
+        assert other.execute(try_lock, {"key": boot.BOOT_LOCK_KEY}).scalar() is True
+        other.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": boot.BOOT_LOCK_KEY})
+    boot_engine.dispose()
+
+
+def test_seeded_database_skips_lock_and_hashing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("should not run on a seeded database")
+
+    monkeypatch.setattr(boot, "advisory_lock", fail)
+    monkeypatch.setattr(boot, "init_sql", fail)
+
+    timings = boot.boot(skip_migrations=True)
+
+    assert list(timings) == ["wait", "seed"]
@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import app
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.crud.sql.entity_cache import CacheInvalidationListener, EntityCache
+
+
+"""Test app/crud/sql/entity_cache"""
+
+# Another worker: publishes an invalidation in its own transaction and commits it
+PEER_PUBLISH = """
+import sys
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.core.cache import LRUCache
+from app.crud.sql.entity_cache import EntityCache
+
+url, channel, key = sys.argv[1:]
+cache = EntityCache(LRUCache(maxsize=10, ttl=60), negative_ttl=5, channel=channel)
+with Session(create_engine(url)) as db:
+    cache.publish(db, {key})
+    db.commit()
+"""
+
+
+def wait_until(condition, timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def test_invalidation_reaches_other_workers():
+    """A peer's committed publish() is delivered by NOTIFY and drops the key here"""
+    cache = EntityCache(LRUCache(maxsize=10, ttl=60), negative_ttl=5, channel=f"test_{uuid.uuid4().hex}")
+    url = str(settings.SQLALCHEMY_DATABASE_URI)
+    listener = CacheInvalidationListener(cache, url)
+    # The listener clears the cache once it is LISTENing
+    cache.set("ready", {})
+    listener.start()
+    try:
+        assert wait_until(lambda: not cache.get("device", "ready")[0])
+        cache.set("device:serial_number:SN-1", {"name": "old"})
+        cache.set("device:serial_number:SN-2", {"name": "kept"})
+
+        subprocess.run(
+            [sys.executable, "-c", PEER_PUBLISH, url, cache.channel, "device:serial_number:SN-1"],
+            cwd=Path(app.__file__).parents[1],
+            check=True,
+        )
+
+        assert wait_until(lambda: not cache.get("device", "device:serial_number:SN-1")[0])
+        assert cache.get("device", "device:serial_number:SN-2") == (True, {"name": "kept"})
+    finally:
+        listener.stop()
+
+
+def test_own_notifications_are_ignored():
+    cache = EntityCache(LRUCache(maxsize=10, ttl=60), negative_ttl=5, channel="entity_cache")
+    cache.set("device:id:1", {"name": "kept"})
+    cache.handle_notification(json.dumps({"pid": os.getpid(), "sent_at": 0, "keys": ["device:id:1"]}))
+    assert cache.get("device", "device:id:1") == (True, {"name": "kept"})
@@ -0,0 +1,70 @@
+import pytest
+
+from app import server
+from app.core.config import Settings, settings
+from app.server import (
+    ConnectionBudgetError,
+    ConnectionDemand,
+    cgroup_cpu_limit,
+    check_connection_budget,
+    pin_password_rounds,
+)
+
+
+"""Test app/server"""
+
+
+def test_cgroup_cpu_limit(tmp_path):
+    assert cgroup_cpu_limit(tmp_path) is None
+
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cgroup_cpu_limit(tmp_path) is None
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("250000\n")
+    assert cgroup_cpu_limit(tmp_path) == 2.5
+
+    # cgroup v2 takes precedence
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_limit(tmp_path) is None
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cgroup_cpu_limit(tmp_path) == 1.5
+
+
+def test_check_connection_budget():
+    demand = ConnectionDemand(workers=4, pool_size=15, max_overflow=5, extra=1)
+
+    check_connection_budget(demand, server_limit=84)
+    with pytest.raises(ConnectionBudgetError):
+        check_connection_budget(demand, server_limit=83)
+    with pytest.raises(ConnectionBudgetError):
+        check_connection_budget(ConnectionDemand(workers=100, pool_size=1, max_overflow=0, extra=0), server_limit=None)
+
+
+def test_pin_password_rounds(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_BCRYPT_ROUNDS", None)
+    monkeypatch.setattr(settings, "PASSWORD_BCRYPT_ROUNDS_CALIBRATED", False)
+    monkeypatch.delenv("PASSWORD_BCRYPT_ROUNDS", raising=False)
+    monkeypatch.delenv("PASSWORD_BCRYPT_ROUNDS_CALIBRATED", raising=False)
+    monkeypatch.setattr(server, "calibrate_bcrypt_rounds", lambda target_ms, min_rounds: 11)
+
+    assert pin_password_rounds() == 11
+    # Workers parse the exported values into the same, upgrade-only cost
+    worker_settings = Settings()
+    assert worker_settings.PASSWORD_BCRYPT_ROUNDS == 11
+    assert worker_settings.PASSWORD_BCRYPT_ROUNDS_CALIBRATED is True
+
+    # A pinned cost is left alone
+    monkeypatch.setattr(server, "calibrate_bcrypt_rounds", lambda target_ms, min_rounds: 9)
+    assert pin_password_rounds() == 11
+
+
+def test_check_replica_connection_budget(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_CONNECTION_BUDGET", 40)
+    demand = ConnectionDemand(
+        workers=4, pool_size=8, max_overflow=2, extra=0, replicas=2, replica_pool_size=8, replica_max_overflow=2
+    )
+    check_connection_budget(demand, server_limit=None)
+    demand.replica_pool_size = 9
+    with pytest.raises(ConnectionBudgetError):
+        check_connection_budget(demand, server_limit=None)
@@ -0,0 +1,54 @@
+"""
+Per-worker test databases
+=========================
+
+Under pytest-xdist (`pytest -n auto`) every worker runs against its own copy of the test
+database, cloned with `CREATE DATABASE ... TEMPLATE` from the configured one, which
+pre-start.sh has migrated and seeded. Cloning copies files instead of replaying the
+migrations, so it takes well under a second, and the copies are dropped when the worker
+finishes.
+
+Postgres refuses to clone a database that has other sessions, so nothing may be connected
+to the template while the workers start.
+"""
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, make_url
+
+from app.core.config import Settings
+
+
+def worker_database_url(settings: Settings, worker_id: str) -> URL:
+    url = make_url(str(settings.SQLALCHEMY_DATABASE_URI))
+    return url.set(database=f"{url.database}_{worker_id}")
+
+
+def _execute_autocommit(url: URL, statement: str) -> None:
+    # CREATE/DROP DATABASE cannot run in a transaction, or while connected to the database itself
+    engine = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        with engine.connect() as connection:
+            connection.execute(text(statement))
+    finally:
+        engine.dispose()
+
+
+def clone_database(template: URL, target: URL) -> None:
+    _execute_autocommit(target, f'DROP DATABASE IF EXISTS "{target.database}" WITH (FORCE)')
+    _execute_autocommit(target, f'CREATE DATABASE "{target.database}" TEMPLATE "{template.database}"')
+
+
+def drop_database(target: URL) -> None:
+    _execute_autocommit(target, f'DROP DATABASE IF EXISTS "{target.database}" WITH (FORCE)')
+
+
+def use_database(settings: Settings, url: URL) -> None:
+    """
+    Point `settings` at another database. Engines read the URL when they are created, so this
+    has to run before `app.db.sql.session` is imported.
+    """
+    settings.POSTGRES_DB = url.database
+    settings.SQLALCHEMY_DATABASE_URI = url.render_as_string(hide_password=False)
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI = url.set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
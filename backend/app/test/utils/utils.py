@@ -1,11 +1,16 @@
 import random
 import string
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any
 
 from factory.declarations import LazyFunction
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app import schemas 
+from app.core.security import create_access_token, get_password_hash
+from app import crud, models, schemas 
 
 
 
@@ -19,6 +24,16 @@ def get_random_str() -> str:
     _ = ''.join(random.choices(string.ascii_letters + string.digits, k=6))
     return _
 
+@lru_cache
+def get_password_hash_cached(password: str) -> str:
+    """bcrypt is slow on purpose; fixtures hash the same password once per test process."""
+    return get_password_hash(password)
+
+def get_token_headers(user_id: Any) -> dict[str, str]:
+    """Authorization headers for `user_id`, signed directly instead of logging in."""
+    a_token = create_access_token(user_id, expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    return {"Authorization": f"Bearer {a_token}"}
+
 def get_test_token_by_user(client: TestClient, user_email:str, user_password:str) -> dict[str, str]:
     login_data = {
         "username": user_email,
@@ -31,17 +46,11 @@ def get_test_token_by_user(client: TestClient, user_email:str, user_password:str
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
 
-def get_admin_token(client: TestClient) -> dict[str, str]:
-    login_data = {
-        "username": settings.FIRST_SUPERUSER_USERNAME,
-        "password": settings.FIRST_SUPERUSER_PASSWORD,
-    }
-
-    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
-    tokens = r.json()
-    a_token = tokens["access_token"]
-    headers = {"Authorization": f"Bearer {a_token}"}
-    return headers
+def get_admin_token(db: Session) -> dict[str, str]:
+    admin = crud.sql.user.read_by_column(
+        db, column=models.sql.User.email, value=settings.FIRST_SUPERUSER_USERNAME
+    )
+    return get_token_headers(admin.id)
 
 random_serial_number = LazyFunction(get_random_str)
 random_email = LazyFunction(get_random_email)
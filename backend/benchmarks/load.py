@@ -0,0 +1,305 @@
+"""
+End-to-end load benchmark
+=========================
+
+Starts the app with uvicorn on a local port (or targets `--base-url`), seeds devices in the
+configured database, and drives each scenario in turn with a closed loop of concurrent
+async HTTP clients:
+
+- `login`: bursts of `POST /login/access-token` (bcrypt bound; 503s are shed attempts).
+- `list_devices`: `GET /devices/` pages.
+- `read_device`: `GET /devices/{id}` for random seeded devices.
+- `create_device`: `POST /devices/` with fresh serial numbers.
+
+For every scenario it records requests per second (successful responses only), p50/p95/p99
+and mean latency, and the status codes, and writes them to a JSON file. With `--baseline`
+it then compares p95 and RPS against that file and exits with status 1 if any scenario got
+worse by more than `--tolerance`. The seeded and created devices are deleted at the end.
+
+Needs only the Postgres database the app is configured for, migrated and seeded with the
+first superuser (the script seeds it if missing).
+
+Usage:
+
+    python -m benchmarks.load --duration 10 --workers 2
+    python -m benchmarks.load --baseline benchmarks/baseline.json
+    python -m benchmarks.load --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import httpx
+from sqlalchemy import delete
+
+from app import crud, models, schemas
+from app.core.config import settings
+from app.db.sql.session import SessionLocal
+from app.seed.init_db import init_sql
+from benchmarks.login_contention import summarize
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+@dataclass
+class Context:
+    tag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    device_ids: List[str] = field(default_factory=list)
+    serials: Iterator[int] = field(default_factory=itertools.count)
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]
+    concurrency: int
+
+
+async def login(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": settings.FIRST_SUPERUSER_USERNAME, "password": settings.FIRST_SUPERUSER_PASSWORD},
+    )
+
+
+async def list_devices(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get(f"{settings.API_V1_STR}/devices/", headers=ctx.headers, params={"limit": 50})
+
+
+async def read_device(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    device_id = random.choice(ctx.device_ids)
+    return await client.get(f"{settings.API_V1_STR}/devices/{device_id}", headers=ctx.headers)
+
+
+async def create_device(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    serial = f"{ctx.tag}-new-{next(ctx.serials)}"
+    return await client.post(
+        f"{settings.API_V1_STR}/devices/",
+        headers=ctx.headers,
+        json={"name": serial, "serial_number": serial, "model": ctx.tag},
+    )
+
+
+def scenarios(concurrency: int, login_concurrency: int) -> List[Scenario]:
+    return [
+        Scenario("login", login, login_concurrency),
+        Scenario("list_devices", list_devices, concurrency),
+        Scenario("read_device", read_device, concurrency),
+        Scenario("create_device", create_device, concurrency),
+    ]
+
+
+async def drive(
+    client: httpx.AsyncClient, scenario: Scenario, ctx: Context, duration: float, warmup: float
+) -> Dict[str, Any]:
+    samples: List[float] = []
+    statuses: Counter = Counter()
+    recording = False
+
+    async def worker(stop: float) -> None:
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                response = await scenario.request(client, ctx)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if recording:
+                statuses[status] += 1
+                if isinstance(status, int) and status < 400:
+                    samples.append(elapsed)
+
+    if warmup:
+        await asyncio.gather(*(worker(time.monotonic() + warmup) for _ in range(scenario.concurrency)))
+    recording = True
+    started = time.monotonic()
+    await asyncio.gather(*(worker(started + duration) for _ in range(scenario.concurrency)))
+    elapsed = time.monotonic() - started
+
+    return {
+        **summarize(samples),
+        "rps": len(samples) / elapsed,
+        "errors": sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400)),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "concurrency": scenario.concurrency,
+    }
+
+
+def seed_devices(tag: str, count: int) -> List[str]:
+    with SessionLocal() as db:
+        init_sql(db)
+        rows = crud.sql.device.create_many(
+            db=db,
+            objs_in=[
+                schemas.sql.DeviceCreate(name=f"device-{i}", serial_number=f"{tag}-{i}", model=tag)
+                for i in range(count)
+            ],
+        )
+    return [str(row.id) for row in rows]
+
+
+def delete_devices(tag: str) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(models.sql.Device).where(models.sql.Device.model == tag))
+        db.commit()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="bench-metrics-"))
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server at {base_url} did not become ready within {timeout:.0f}s")
+            await asyncio.sleep(0.25)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Scenarios whose p95 latency rose, or whose RPS fell, by more than `tolerance` (a fraction).
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {current['rps']:.1f}")
+    return regressions
+
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    for name, result in results["scenarios"].items():
+        line = (
+            f"{name:>14}: {result['rps']:8.1f} rps  p50 {result['p50_ms']:7.1f}  p95 {result['p95_ms']:7.1f}  "
+            f"p99 {result['p99_ms']:7.1f} ms  statuses {result['statuses']}"
+        )
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        if base:
+            line += f"  (baseline {base['rps']:.1f} rps, p95 {base['p95_ms']:.1f} ms)"
+        print(line)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    ctx = Context(tag=f"bench-{uuid.uuid4().hex[:8]}")
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.workers)
+    try:
+        ctx.device_ids = seed_devices(ctx.tag, args.devices)
+        await wait_ready(base_url)
+        limits = httpx.Limits(max_connections=max(args.concurrency, args.login_concurrency))
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            token = (await login(client, ctx)).json()["access_token"]
+            ctx.headers = {"Authorization": f"Bearer {token}"}
+            results = {}
+            for scenario in scenarios(args.concurrency, args.login_concurrency):
+                if args.scenario and scenario.name not in args.scenario:
+                    continue
+                results[scenario.name] = await drive(client, scenario, ctx, args.duration, args.warmup)
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        delete_devices(ctx.tag)
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url or "local",
+            "workers": args.workers if args.base_url is None else None,
+            "duration_s": args.duration,
+            "devices": args.devices,
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers of the started server")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    parser.add_argument("--devices", type=int, default=1000, help="devices seeded for the read scenarios")
+    parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--baseline", type=Path, help="compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/RPS change before a regression")
+    parser.add_argument("--save-baseline", type=Path, help="also write the results to this baseline file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = args.output or RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2) + "\n")
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_results(results, baseline)
+    print(f"Results written to {output}")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Login storm benchmark
+=====================
+
+Measures `GET /devices/` latency while a number of clients hammer `/login/access-token`,
+which shows whether bcrypt work starves the other endpoints of a worker.
+
+The script runs two phases against an already running server: `GET /devices/` alone,
+then `GET /devices/` with concurrent logins, and prints p50/p95/p99 for both plus the
+status codes the logins got (503 means the bounded login queue shed the attempt).
+
+Usage:
+
+    python -m benchmarks.login_contention --base-url http://localhost:8000 --duration 15 --login-concurrency 32
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+
+from app.core.config import settings
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": (statistics.fmean(samples) * 1000) if samples else float("nan"),
+    }
+
+
+async def login(client: httpx.AsyncClient) -> httpx.Response:
+    return await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": settings.FIRST_SUPERUSER_USERNAME, "password": settings.FIRST_SUPERUSER_PASSWORD},
+    )
+
+
+async def read_devices_loop(client: httpx.AsyncClient, headers: Dict[str, str], stop: float, samples: List[float]) -> None:
+    while time.monotonic() < stop:
+        start = time.perf_counter()
+        response = await client.get(f"{settings.API_V1_STR}/devices/", headers=headers, params={"limit": 20})
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+
+async def login_loop(client: httpx.AsyncClient, stop: float, statuses: Counter) -> None:
+    while time.monotonic() < stop:
+        response = await login(client)
+        statuses[response.status_code] += 1
+        if response.status_code == 503:
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+
+
+async def run_phase(
+    client: httpx.AsyncClient, headers: Dict[str, str], duration: float, read_concurrency: int, login_concurrency: int
+) -> Dict[str, object]:
+    stop = time.monotonic() + duration
+    samples: List[float] = []
+    statuses: Counter = Counter()
+    await asyncio.gather(
+        *(read_devices_loop(client, headers, stop, samples) for _ in range(read_concurrency)),
+        *(login_loop(client, stop, statuses) for _ in range(login_concurrency)),
+    )
+    return {"devices": summarize(samples), "login_statuses": dict(statuses)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.read_concurrency + args.login_concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = (await login(client)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        idle = await run_phase(client, headers, args.duration, args.read_concurrency, 0)
+        storm = await run_phase(client, headers, args.duration, args.read_concurrency, args.login_concurrency)
+
+    for name, result in (("idle", idle), ("login storm", storm)):
+        devices = result["devices"]
+        print(
+            f"{name:>12}: GET /devices/ n={devices['count']} p50={devices['p50_ms']:.1f}ms "
+            f"p95={devices['p95_ms']:.1f}ms p99={devices['p99_ms']:.1f}ms"
+        )
+    print(f"login statuses during storm: {storm['login_statuses']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per phase")
+    parser.add_argument("--read-concurrency", type=int, default=4)
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Read-only session benchmark
+===========================
+
+Compares one `GET /devices/` page read the old way (read-write `SessionLocal`, ORM objects
+in the identity map) with the read-only path (`ReadOnlySessionLocal`, plain dicts), including
+serialization to JSON. Reports latency percentiles and the peak Python memory allocated per
+page (tracemalloc).
+
+The script inserts `--rows` devices tagged with a random model name into the configured
+database, runs both variants, and deletes them again.
+
+Usage:
+
+    python -m benchmarks.read_only_session --rows 1000 --page 1000 --repeat 200
+"""
+
+import argparse
+import time
+import tracemalloc
+import uuid
+from typing import Callable, Dict, List
+
+from sqlalchemy import delete
+
+from app import crud, models, schemas
+from app.db.sql.session import ReadOnlySessionLocal, SessionLocal
+from benchmarks.login_contention import summarize
+
+
+def read_write_page(limit: int) -> bytes:
+    with SessionLocal() as db:
+        devices, _ = crud.sql.device.read_page(db=db, limit=limit)
+        return schemas.sql.dump_json_list(schemas.sql.Device, devices)
+
+
+def read_only_page(limit: int) -> bytes:
+    with ReadOnlySessionLocal() as db:
+        devices, _ = crud.sql.device.read_page(db=db, limit=limit, as_dicts=True)
+        return schemas.sql.dump_json_list(schemas.sql.Device, devices)
+
+
+def measure(fn: Callable[[int], bytes], limit: int, repeat: int) -> Dict[str, float]:
+    fn(limit)
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(limit)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {**summarize(samples), "peak_kib": peak / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    with SessionLocal() as db:
+        crud.sql.device.create_many(
+            db=db,
+            objs_in=[
+                schemas.sql.DeviceCreate(name=f"device-{i}", serial_number=f"{tag}-{i}", model=tag)
+                for i in range(args.rows)
+            ],
+        )
+    try:
+        for name, fn in (("read-write", read_write_page), ("read-only", read_only_page)):
+            result = measure(fn, args.page, args.repeat)
+            print(
+                f"{name:>10}: p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  "
+                f"peak {result['peak_kib']:8.1f} KiB"
+            )
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(models.sql.Device).where(models.sql.Device.model == tag))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+List serialization benchmark
+============================
+
+Compares the per-item cost of turning a page of `Device` ORM objects into a JSON body:
+
+- `before`: a `TypeAdapter` built per call, `validate_python`, then FastAPI's `response_model`
+  pass (`serialize_response`: validate again, `jsonable_encoder`) and `JSONResponse` rendering.
+- `after`: the cached adapter from `app.schemas.sql.serialization`, one validation and
+  `dump_json` straight to bytes, as the list endpoints now do.
+
+No database is needed; the objects are transient ORM instances.
+
+Usage:
+
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from app import models, schemas
+
+
+def make_devices(rows: int) -> List[Any]:
+    now = datetime.now(timezone.utc)
+    return [
+        models.sql.Device(
+            id=uuid.uuid4(), name=f"device-{i}", serial_number=f"SN-{i:08d}", model="bench",
+            created_at=now, updated_at=now,
+        )
+        for i in range(rows)
+    ]
+
+
+def before(devices: List[Any]) -> bytes:
+    content = TypeAdapter(List[schemas.sql.Device]).validate_python(devices)
+    field = create_model_field(name="Response_read_devices", type_=List[schemas.sql.Device], mode="serialization")
+    encoded = asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=False))
+    return JSONResponse(encoded).body
+
+
+def after(devices: List[Any]) -> bytes:
+    return schemas.sql.dump_json_list(schemas.sql.Device, devices)
+
+
+def measure(fn: Callable[[List[Any]], bytes], devices: List[Any], repeat: int) -> float:
+    fn(devices)  # warm up adapters and caches
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(devices)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    devices = make_devices(args.rows)
+    for name, fn in (("before", before), ("after", after)):
+        best = measure(fn, devices, args.repeat)
+        print(f"{name:>6}: {best * 1000:8.2f} ms per page  {best / args.rows * 1e6:6.2f} us per item")
+
+
+if __name__ == "__main__":
+    main()
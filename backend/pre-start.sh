@@ -3,16 +3,19 @@
 set -e
 set -x
 
-# Let the DB start
-python /backend/app/backend_pre_start.py
+# Workers share Prometheus samples through this directory (see app/core/metrics.py)
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-multiproc}
+# Emptied before any Python runs: app.boot and the tests import the metrics too
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
 
-# Run migrations
-alembic upgrade head
+# Wait for the DB, then migrate and seed unless that is already done (see app/boot.py)
+python -m app.boot
 
-# Create initial data in DB
-python /backend/app/seed/seeder.py
-
-# Start FastAPI server with workers
+# Start the server; workers are sized from the CPUs available (see app/server.py).
+# DEV_RELOAD=1 runs a single worker that reloads on code changes.
 if [[ "$ENV_FILE" != *".env.test" ]]; then
-  exec fastapi run app/main.py --host 0.0.0.0 --port 80 --workers 4 --reload
+  if [[ "${DEV_RELOAD:-0}" == "1" ]]; then
+    exec python -m app.server --dev
+  fi
+  exec python -m app.server
 fi
\ No newline at end of file